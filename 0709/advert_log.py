@@ -0,0 +1,83 @@
+import json
+import os
+from collections import Counter
+
+from mininet.log import info
+from mininet.node import Node
+
+from convergence_monitor import LogTail, node_home
+
+# advert_data.go가 노드별 homeDir에 쓰는 JSONL 로그
+ADVERT_LOG = 'advert_log.jsonl'
+
+# handlePushedAdvert가 받은 IBF마다 남기는 ibf_decode 레코드의 path
+#   ok                : dIBF 디코딩 성공
+#   estimate_fetch    : 차이 추정이 IBF 용량을 넘어 바로 전체 광고 fetch
+#   decode_fail_fetch : 디코딩 실패 후 전체 광고 fetch
+DECODE_PATHS = ('ok', 'estimate_fetch', 'decode_fail_fetch')
+
+def parse_records(data: bytes) -> list[dict]:
+    records = []
+    for line in data.splitlines():
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue
+    return records
+
+def decode_paths(records: list[dict]) -> Counter:
+    """Counts ibf_decode records by path."""
+    return Counter(r.get('path') for r in records if r.get('kind') == 'ibf_decode')
+
+class AdvertLog:
+    """
+    Streams every node's advert_log.jsonl. Each phase() reads only the
+    bytes appended since the previous phase, so per-phase reports and the
+    combined final log never re-read a node's log from the start.
+    """
+
+    def __init__(self, nodes: list[Node], log=ADVERT_LOG):
+        self.tails = {node.name: LogTail(os.path.join(node_home(node), log)) for node in nodes}
+        self.partial = {name: b'' for name in self.tails}
+        self.paths = Counter()
+
+    def read_new(self) -> dict[str, bytes]:
+        """Complete lines appended to each node's log since the last read."""
+        new = {}
+        for name, tail in self.tails.items():
+            data = self.partial[name] + tail.read_new()
+            # 마지막 줄이 아직 다 안 써졌으면 다음 read로 넘긴다
+            complete, nl, self.partial[name] = data.rpartition(b'\n')
+            new[name] = complete + nl
+        return new
+
+    def phase(self, label: str, output_file: str = None) -> dict[str, list[dict]]:
+        """
+        Close a phase: append its new log lines to `output_file` (if given),
+        report the IBF decode paths taken and return the phase's records
+        per node.
+        """
+        raw = self.read_new()
+        if output_file:
+            with open(output_file, 'ab') as out:
+                out.write(f'\n===== {label} =====\n'.encode())
+                for name, data in raw.items():
+                    out.write(f'\n--- Node {name} ---\n'.encode())
+                    out.write(data)
+
+        records = {name: parse_records(data) for name, data in raw.items()}
+        paths = Counter()
+        for recs in records.values():
+            paths.update(decode_paths(recs))
+        self.paths.update(paths)
+
+        received = sum(paths.values())
+        summary = ', '.join(f'{path}={paths[path]}' for path in DECODE_PATHS)
+        fetched = paths['estimate_fetch'] + paths['decode_fail_fetch']
+        rate = f'{fetched / received:.1%}' if received else 'n/a'
+        info(f'[{label}] IBF decode paths: {summary} (fetch fallback {rate} of {received})\n')
+        return records
+
+    def report_total(self) -> None:
+        total = ', '.join(f'{path}={self.paths[path]}' for path in DECODE_PATHS)
+        info(f'IBF decode paths (all phases): {total}\n')
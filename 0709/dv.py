@@ -1,19 +1,24 @@
 import json
-import subprocess
+import os
 import shutil
 
 from minindn.apps.application import Application
 
+import keycache
+import resources
+
 DEFAULT_NETWORK = '/minindn'
 
 TRUST_ROOT_NAME: str = None
+TRUST_ROOT_NETWORK: str = None
+TRUST_ROOT_DIR: str = None
 TRUST_ROOT_PATH = '/tmp/mn-dv-root'
 
 class NDNd_DV(Application):
     config: str
     network: str
 
-    def __init__(self, node, network=DEFAULT_NETWORK):
+    def __init__(self, node, network=DEFAULT_NETWORK, reuse_keys=False):
         Application.__init__(self, node)
         self.network = network
 
@@ -29,7 +34,9 @@ class NDNd_DV(Application):
         if TRUST_ROOT_NAME is None:
             raise Exception('Trust root not initialized (call NDNDV.init_trust first)')
 
-        self.init_keys()
+        # warm reuse: 현재 trust root 로 서명된 키가 남아 있으면 재사용
+        if not (reuse_keys and self.has_keys()):
+            self.init_keys()
 
         config = {
             'dv': {
@@ -48,21 +55,53 @@ class NDNd_DV(Application):
             json.dump(config, f, indent=4)
 
     def start(self):
-        Application.start(self, ['ndnd', 'dv', 'run', self.config], logfile='dv.log')
+        Application.start(self, ['ndnd', 'dv', 'run', self.config], logfile='dv.log',
+                          envDict=resources.dv_env(self.node.name))
+        resources.pin_app(self)
+
+    @staticmethod
+    def init_trust(network=DEFAULT_NETWORK, reuse=False) -> None:
+        """
+        Take the trust root of `network` from the key cache (generated on a
+        miss). With `reuse`, keep the root of an earlier call for the same
+        network without touching the cache.
+        """
+        global TRUST_ROOT_NAME, TRUST_ROOT_NETWORK, TRUST_ROOT_DIR
+        if reuse and TRUST_ROOT_NAME is not None and TRUST_ROOT_NETWORK == network \
+                and os.path.exists(f'{TRUST_ROOT_PATH}.cert'):
+            return
+        TRUST_ROOT_DIR = keycache.root(network)
+        shutil.copyfile(f'{TRUST_ROOT_DIR}/root.key', f'{TRUST_ROOT_PATH}.key')
+        shutil.copyfile(f'{TRUST_ROOT_DIR}/root.cert', f'{TRUST_ROOT_PATH}.cert')
+        TRUST_ROOT_NAME = keycache.cert_name(f'{TRUST_ROOT_PATH}.cert')
+        TRUST_ROOT_NETWORK = network
 
     @staticmethod
-    def init_trust(network=DEFAULT_NETWORK) -> None:
-        global TRUST_ROOT_NAME
-        out = subprocess.check_output(f'ndnd sec keygen {network} ed25519 > {TRUST_ROOT_PATH}.key', shell=True)
-        out = subprocess.check_output(f'ndnd sec sign-cert {TRUST_ROOT_PATH}.key < {TRUST_ROOT_PATH}.key > {TRUST_ROOT_PATH}.cert', shell=True)
-        out = subprocess.check_output(f'cat {TRUST_ROOT_PATH}.cert | grep "Name:" | cut -d " " -f 2', shell=True)
-        TRUST_ROOT_NAME = out.decode('utf-8').strip()
+    def provision_keys(nodes: list, network=DEFAULT_NETWORK) -> None:
+        """Fill the key cache for all nodes concurrently, so init_keys() only copies files."""
+        keycache.provision(TRUST_ROOT_DIR, network, [node.name for node in nodes])
 
     def init_keys(self) -> None:
-        self.node.cmd(f'rm -rf dv-keys && mkdir -p dv-keys')
-        self.node.cmd(f'ndnd sec keygen {self.network}/{self.node.name}/32=DV ed25519 > dv-keys/{self.node.name}.key')
-        self.node.cmd(f'ndnd sec sign-cert {TRUST_ROOT_PATH}.key < dv-keys/{self.node.name}.key > dv-keys/{self.node.name}.cert')
-        self.node.cmd(f'cp {TRUST_ROOT_PATH}.cert dv-keys/')
+        cached = keycache.node_keys(TRUST_ROOT_DIR, self.network, self.node.name)
+        keys = f'{self.homeDir}/dv-keys'
+        shutil.rmtree(keys, ignore_errors=True)
+        os.makedirs(keys)
+        shutil.copyfile(f'{cached}/node.key', f'{keys}/{self.node.name}.key')
+        shutil.copyfile(f'{cached}/node.cert', f'{keys}/{self.node.name}.cert')
+        shutil.copy(f'{TRUST_ROOT_PATH}.cert', keys)
+        with open(f'{keys}/.trust_root', 'w') as f:
+            f.write(TRUST_ROOT_NAME)
+
+    def has_keys(self) -> bool:
+        """dv-keys from an earlier init_keys() under the current trust root."""
+        keys = f'{self.homeDir}/dv-keys'
+        try:
+            with open(f'{keys}/.trust_root') as f:
+                if f.read() != TRUST_ROOT_NAME:
+                    return False
+        except OSError:
+            return False
+        return all(os.path.exists(f'{keys}/{self.node.name}.{ext}') for ext in ('key', 'cert'))
 
     # def neighbors(self):
     #     for intf in self.node.intfList():
@@ -133,7 +133,8 @@
 ############################## CSV 파일 실험 ######################################################################
 import time
 import os
-import csv
+
+from concurrent.futures import ThreadPoolExecutor
 
 from mininet.log import info
 from mininet.node import Node
@@ -142,159 +143,213 @@ from minindn.minindn import Minindn
 from minindn.apps.app_manager import AppManager
 
 from dv import NDNd_DV, DEFAULT_NETWORK
-from config import (
-    router_names, per_node, cycle, per_node_total,
-    second_phase_count, CSV_FILE_NAME, NETWORK_PREFIX
-)
+from convergence_monitor import ConvergenceMonitor
+from route_table import RouteTable
+import readiness
+from prefix_plan import PrefixPlan
+from config import CSV_FILE_NAME
 
-def setup(ndn: Minindn, network=DEFAULT_NETWORK) -> None:
-    time.sleep(1)  # wait for forwarder to start
-    NDNd_DV.init_trust()
-    info('Starting ndn-dv on nodes\n')
-    AppManager(ndn, ndn.net.hosts, NDNd_DV, network=network)
+PLAN = PrefixPlan()
 
-def converge(nodes: list[Node], deadline=30, network=DEFAULT_NETWORK) -> int:
-    info('Waiting for routing to converge\n')
-    start = time.time()
-    while time.time() - start < deadline:
-        time.sleep(1)
-        if is_converged(nodes, network=network):
-            total = round(time.time() - start)
-            info(f'Routing converged in {total} seconds\n')
-            return total
-    raise Exception('Routing did not converge')
-
-def is_converged(nodes: list[Node], network=DEFAULT_NETWORK) -> bool:
-    prefix_file_path = os.path.join(os.path.dirname(__file__), 'file0.txt')
-    with open(prefix_file_path, 'r') as f:
-        lines = [line.strip() for line in f if line.strip()]
-
-    for node in nodes:
-        routes = node.cmd('ndnd fw route-list')
-        for line in lines:
-            try:
-                node_name, prefix = line.split('/', 1)
-                full_prefix = f'{network}/{node_name}/{prefix}'
-                if full_prefix not in routes:
-                    info(f'Routing not converged on {node.name} for {full_prefix}\n')
-                    return False
-            except ValueError:
-                continue
-    return True
+# route-list 를 동시에 가져올 최대 스레드 수
+POLL_WORKERS = 32
 
-def converge_ibf(nodes: list[Node], deadline=30, network=DEFAULT_NETWORK) -> int:
-    info('Waiting for routing to converge\n')
-    start = time.time()
-    while time.time() - start < deadline:
-        time.sleep(1)
-        if is_converged_ibf(nodes, network=network):
-            total = round(time.time() - start)
-            info(f'Routing converged in {total} seconds\n')
-            return total
-    raise Exception('Routing did not converge')
+# 마지막 converge* 호출에서 노드별 수렴 시간 (초, start 기준)
+LAST_NODE_TIMES: dict[str, float] = {}
 
-def is_converged_ibf(nodes: list[Node], network=DEFAULT_NETWORK) -> bool:
-    base_dir = os.path.dirname(__file__)
-    csv_path = os.path.join(base_dir, CSV_FILE_NAME)
+_poll_pool: ThreadPoolExecutor = None
 
-    if not os.path.exists(csv_path):
-        info(f'[ERROR] {CSV_FILE_NAME} not found: {csv_path}\n')
-        return False
+# warm reuse (runner.run(..., warm=True)): 시나리오 사이에 유지되는 forwarder 와 DV 앱
+_fw: tuple[type, AppManager] = None
+_dv_apps: AppManager = None
+_warm = False
 
-    with open(csv_path, 'r') as f:
-        reader = csv.DictReader(f)
-        clean_prefixes = [row['prefix'].strip().lstrip('/') for row in reader if row.get('prefix')]
+# warm_reset 후 route 가 모두 사라질 때까지 기다리는 최대 시간 (초)
+WARM_RESET_DEADLINE = 5.0
 
-    all_prefixes = []
-    for idx, router in enumerate(router_names):
-        for c in range(cycle):
-            start = idx * per_node_total + c * per_node
-            end = start + per_node
-            assigned = clean_prefixes[start:end]
-            for p in assigned:
-                all_prefixes.append(f'{network}/{router}/{p}')
+def start_forwarder(ndn: Minindn, fw) -> AppManager:
+    """Start `fw` on every node, or keep the ones a warm_reset() left running."""
+    global _fw
+    if _fw is not None and _fw[0] is fw:
+        info('Reusing running forwarders\n')
+        return _fw[1]
+    _fw = (fw, AppManager(ndn, ndn.net.hosts, fw))
+    return _fw[1]
 
-    for node in nodes:
+def setup(ndn: Minindn, network=DEFAULT_NETWORK) -> None:
+    global _dv_apps
+    # forwarder unix socket 이 열릴 때까지 대기 (warm reuse 면 바로 통과)
+    readiness.wait_forwarders(ndn.net.hosts, _fw[1].apps if _fw else None)
+    NDNd_DV.init_trust(network, reuse=_warm)
+    if not _warm:
+        NDNd_DV.provision_keys(ndn.net.hosts, network)
+    info('Starting ndn-dv on nodes\n')
+    _dv_apps = AppManager(ndn, ndn.net.hosts, NDNd_DV, network=network, reuse_keys=_warm)
+    readiness.wait_dv(ndn.net.hosts, _dv_apps.apps, network)
+
+def warm_reset(ndn: Minindn, network=DEFAULT_NETWORK) -> None:
+    """
+    Reset routing state between scenarios while keeping the forwarders,
+    the trust root and every node's dv-keys: kill the producers, stop DV
+    and remove the routes it left under `network`. The next setup()
+    restarts DV with the existing keys.
+    """
+    global _dv_apps, _warm
+    info('Resetting RIB and producers (warm reuse)\n')
+    os.system("pkill -f 'ndnd put'")
+    if _dv_apps is not None:
+        _dv_apps.cleanup()
+        _dv_apps = None
+
+    by_name = {node.name: node for node in ndn.net.hosts}
+    for name, table in poll_route_lists(ndn.net.hosts).items():
+        cmds = []
+        for prefix in table.under(network):
+            for fields in table.routes[prefix]:
+                cmd = route_remove_cmd(prefix, fields)
+                if cmd is None:
+                    info(f'[WARN] {name}: no face for route {prefix} {fields}, cannot remove\n')
+                else:
+                    cmds.append(cmd)
+        if cmds:
+            by_name[name].cmd(' ; '.join(cmds))
+
+    # 남은 route 가 있으면 다음 시나리오가 바로 수렴한 것처럼 보이므로
+    # 모두 사라질 때까지 기다리고, 안 사라지면 TimeoutError
+    readiness.wait_until(lambda: not any(table.under(network)
+                                         for table in poll_route_lists(ndn.net.hosts).values()),
+                         f'route reset under {network}', deadline=WARM_RESET_DEADLINE)
+    _warm = True
+
+def route_remove_cmd(prefix: str, fields: dict[str, str]) -> str:
+    """route-remove command for one route-list entry, or None if it names no face."""
+    face = fields.get('nexthop', fields.get('face'))
+    if face is None:
+        return None
+    cmd = f'ndnd fw route-remove prefix={prefix} face={face}'
+    if 'origin' in fields:
+        cmd += f' origin={fields["origin"]}'
+    return cmd + ' > /dev/null 2>&1'
+
+def cold_reset() -> None:
+    """Forget warm state after the runner stopped every app."""
+    global _fw, _dv_apps, _warm
+    _fw = None
+    _dv_apps = None
+    _warm = False
+
+def poll_route_lists(nodes: list[Node]) -> dict[str, RouteTable]:
+    """
+    Fetch `ndnd fw route-list` from all nodes concurrently.
+    Returns {node name: RouteTable}; each table's `taken_at` is the time
+    that node's shell answered.
+    """
+    global _poll_pool
+    if _poll_pool is None:
+        _poll_pool = ThreadPoolExecutor(max_workers=POLL_WORKERS, thread_name_prefix='route-poll')
+
+    def poll(node: Node) -> tuple[str, RouteTable]:
         routes = node.cmd('ndnd fw route-list')
-        for prefix in all_prefixes:
-            if prefix not in routes:
-                info(f'Routing not converged on {node.name} for {prefix}\n')
-                return False
-
-    return True
-
-def converge_ibf_cycle(nodes: list[Node], cycle_index: int, deadline=30, network=DEFAULT_NETWORK) -> int:
-    info(f'Waiting for routing to converge (Cycle {cycle_index + 1})\n')
+        return node.name, RouteTable.parse(routes, taken_at=time.time())
+
+    return dict(_poll_pool.map(poll, nodes))
+
+def _wait_converged(nodes: list[Node], prefixes: list[str], deadline: float, label: str) -> float:
+    """
+    Wait until every node has every prefix in `prefixes`.
+    All nodes are checked once up front; after that only nodes whose DV
+    logs show a change are rechecked, plus every unconverged node whenever
+    the monitor's fallback poll fires. Each node's convergence time comes
+    from the route-list snapshot that first showed it converged.
+    """
+    LAST_NODE_TIMES.clear()
+    if prefixes is None:
+        raise Exception(f'{label} did not converge (no expected prefixes)')
+
+    by_name = {node.name: node for node in nodes}
+    monitor = ConvergenceMonitor(nodes)
     start = time.time()
-    while time.time() - start < deadline:
-        time.sleep(1)
-        if is_converged_ibf_cycle(nodes, cycle_index=cycle_index, network=network):
-            total = round(time.time() - start)
-            info(f'[Cycle {cycle_index + 1}] Routing converged in {total} seconds\n')
+    end = start + deadline
+    recheck = set(by_name)
+    while True:
+        snapshots = poll_route_lists([by_name[name] for name in recheck])
+        for name, table in snapshots.items():
+            missing = table.first_missing(prefixes)
+            if missing is None:
+                LAST_NODE_TIMES.setdefault(name, table.taken_at - start)
+            else:
+                LAST_NODE_TIMES.pop(name, None)
+                info(f'{label} not converged on {name} for {missing}\n')
+
+        if len(LAST_NODE_TIMES) == len(nodes):
+            for name, t in sorted(LAST_NODE_TIMES.items()):
+                info(f'  {name} converged at {t:.3f}s\n')
+            total = round(max(LAST_NODE_TIMES.values(), default=0.0), 3)
+            info(f'{label} converged in {total:.3f} seconds\n')
             return total
-    raise Exception(f'[Cycle {cycle_index + 1}] Routing did not converge')
 
-def is_converged_ibf_cycle(nodes: list[Node], cycle_index: int, network=DEFAULT_NETWORK) -> bool:
-    base_dir = os.path.dirname(__file__)
-    csv_path = os.path.join(base_dir, CSV_FILE_NAME)
+        if time.time() >= end:
+            break
+        changed = monitor.wait(end)
+        recheck = changed or set(by_name) - set(LAST_NODE_TIMES)
+
+    raise Exception(f'{label} did not converge')
 
-    if not os.path.exists(csv_path):
-        info(f'[ERROR] {CSV_FILE_NAME} not found: {csv_path}\n')
+def _is_converged(nodes: list[Node], prefixes: list[str], label='Routing') -> bool:
+    if prefixes is None:
         return False
+    for name, table in poll_route_lists(nodes).items():
+        missing = table.first_missing(prefixes)
+        if missing is not None:
+            info(f'{label} not converged on {name} for {missing}\n')
+            return False
+    return True
 
-    with open(csv_path, 'r') as f:
-        reader = csv.DictReader(f)
-        clean_prefixes = [row['prefix'].strip().lstrip('/') for row in reader if row.get('prefix')]
+def _csv_plan() -> PrefixPlan:
+    PLAN.refresh()
+    if not PLAN.loaded:
+        info(f'[ERROR] {CSV_FILE_NAME} not found: {PLAN.csv_path}\n')
+    return PLAN
 
-    cycle_prefixes = []
-    for idx, router in enumerate(router_names):
-        start = idx * per_node_total + cycle_index * per_node
-        end = start + per_node
-        assigned = clean_prefixes[start:end]
-        for p in assigned:
-            cycle_prefixes.append(f'{network}/{router}/{p}')
+def converge(nodes: list[Node], deadline=30, network=DEFAULT_NETWORK) -> float:
+    info('Waiting for routing to converge\n')
+    return _wait_converged(nodes, file0_prefixes(network), deadline, 'Routing')
 
-    for node in nodes:
-        routes = node.cmd('ndnd fw route-list')
-        for prefix in cycle_prefixes:
-            if prefix not in routes:
-                info(f'[Cycle {cycle_index + 1}] Routing not converged on {node.name} for {prefix}\n')
-                return False
+def file0_prefixes(network=DEFAULT_NETWORK) -> list[str]:
+    PLAN.refresh()
+    return PLAN.file0_prefixes(network)
 
-    return True
+def is_converged(nodes: list[Node], network=DEFAULT_NETWORK) -> bool:
+    return _is_converged(nodes, file0_prefixes(network))
 
-def converge_new_prefix(nodes: list[Node], deadline=30, network=DEFAULT_NETWORK) -> int:
-    info('Waiting for NEW prefixes to converge\n')
-    start = time.time()
-    while time.time() - start < deadline:
-        time.sleep(1)
-        if is_converged_new_prefix(nodes, network=network):
-            total = round(time.time() - start)
-            info(f'New prefix routing converged in {total} seconds\n')
-            return total
-    raise Exception('New prefix routing did not converge')
+def converge_ibf(nodes: list[Node], deadline=30, network=DEFAULT_NETWORK) -> float:
+    info('Waiting for routing to converge\n')
+    return _wait_converged(nodes, ibf_prefixes(network), deadline, 'Routing')
 
-def is_converged_new_prefix(nodes: list[Node], network=DEFAULT_NETWORK) -> bool:
-    base_dir = os.path.dirname(__file__)
-    csv_path = os.path.join(base_dir, CSV_FILE_NAME)
+def ibf_prefixes(network=DEFAULT_NETWORK) -> list[str]:
+    return _csv_plan().all_prefixes(network)
 
-    if not os.path.exists(csv_path):
-        info(f'[ERROR] {CSV_FILE_NAME} not found\n')
-        return False
+def is_converged_ibf(nodes: list[Node], network=DEFAULT_NETWORK) -> bool:
+    return _is_converged(nodes, ibf_prefixes(network))
 
-    with open(csv_path, 'r') as f:
-        reader = csv.DictReader(f)
-        all_prefixes = [row['prefix'].strip().lstrip('/') for row in reader if row.get('prefix')]
+def converge_ibf_cycle(nodes: list[Node], cycle_index: int, deadline=30, network=DEFAULT_NETWORK) -> float:
+    info(f'Waiting for routing to converge (Cycle {cycle_index + 1})\n')
+    return _wait_converged(nodes, ibf_cycle_prefixes(cycle_index, network),
+                           deadline, f'[Cycle {cycle_index + 1}] Routing')
 
-    start_idx = len(router_names) * per_node_total
-    new_prefixes = all_prefixes[start_idx:start_idx + second_phase_count]
+def ibf_cycle_prefixes(cycle_index: int, network=DEFAULT_NETWORK) -> list[str]:
+    return _csv_plan().cycle_prefixes(cycle_index, network)
 
-    for node in nodes:
-        routes = node.cmd('ndnd fw route-list')
-        for prefix in new_prefixes:
-            full_prefix = f'{network}/a/{prefix}'
-            if full_prefix not in routes:
-                info(f'Routing not converged on {node.name} for {full_prefix}\n')
-                return False
+def is_converged_ibf_cycle(nodes: list[Node], cycle_index: int, network=DEFAULT_NETWORK) -> bool:
+    return _is_converged(nodes, ibf_cycle_prefixes(cycle_index, network),
+                         label=f'[Cycle {cycle_index + 1}] Routing')
 
-    return True
+def converge_new_prefix(nodes: list[Node], deadline=30, network=DEFAULT_NETWORK) -> float:
+    info('Waiting for NEW prefixes to converge\n')
+    return _wait_converged(nodes, new_prefixes(network), deadline, 'New prefix routing')
+
+def new_prefixes(network=DEFAULT_NETWORK) -> list[str]:
+    return _csv_plan().new_prefixes('a', network)
+
+def is_converged_new_prefix(nodes: list[Node], network=DEFAULT_NETWORK) -> bool:
+    return _is_converged(nodes, new_prefixes(network))
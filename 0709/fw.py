@@ -4,9 +4,13 @@ import shutil
 
 from minindn.apps.application import Application
 
+import resources
+
 class NDNd_FW(Application):
-    def __init__(self, node, config={}, logLevel='INFO', threads=2):
+    def __init__(self, node, config={}, logLevel='INFO', threads=None):
         Application.__init__(self, node)
+        # threads 를 주지 않으면 resources.PLAN 의 노드별 값 (없으면 2)
+        threads = threads or resources.fw_threads(node.name)
 
         if not shutil.which('ndnd'):
             raise Exception('ndnd not found in PATH, did you install it?')
@@ -53,3 +57,4 @@ class NDNd_FW(Application):
     def start(self):
         Application.start(self, f'ndnd fw run {self.confFile}',
                           logfile=self.logFile, envDict=self.envDict)
+        resources.pin_app(self)
@@ -0,0 +1,196 @@
+"""
+Per-node, per-phase metrics of a scenario run.
+
+Four tables are collected while a scenario runs and written as columns of
+one NumPy .npz per run (plus one Parquet file per table when pyarrow is
+installed):
+
+  advert  phase, node, nbr, seq, bytes, cells      one row per pushed IBF
+  decode  phase, node, nbr, path, cells, adds, withdraws
+                                                   one row per received IBF
+  node    phase, node, converge_s, routes          one row per node per phase
+  link    phase, node, intf, link, rx/tx bytes and packets
+                                                   one row per interface per phase
+
+Run metadata (scenario, mode, resource plan, ...) is stored as JSON under `meta`.
+`python metrics.py /tmp/minindn_metrics/*.npz` prints percentile summaries
+grouped by mode and phase across runs; load / summarize and the CLI need
+only NumPy, the Mininet-side modules are imported when a run records.
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+from collections import defaultdict
+
+import numpy as np
+
+METRICS_DIR = '/tmp/minindn_metrics'
+PERCENTILES = (50, 90, 99)
+
+TABLES = {
+    'advert': ('phase', 'node', 'nbr', 'seq', 'bytes', 'cells'),
+    'decode': ('phase', 'node', 'nbr', 'path', 'cells', 'adds', 'withdraws'),
+    'node': ('phase', 'node', 'converge_s', 'routes'),
+    # netstats.COUNTERS
+    'link': ('phase', 'node', 'intf', 'link', 'rx_bytes', 'rx_packets', 'tx_bytes', 'tx_packets'),
+}
+_STRING_COLUMNS = {'phase', 'node', 'nbr', 'path', 'intf', 'link'}
+
+class Metrics:
+    def __init__(self, scenario: str, mode='ibf', meta: dict = None):
+        # 분석 호스트에는 mininet 이 없으므로 기록할 때만 import
+        import netstats
+        import proc_sampler
+        import resources
+        self.meta = {'scenario': scenario, 'mode': mode, 'started': time.time(),
+                     'resources': resources.to_dict(),
+                     'proc_samples': proc_sampler.SAMPLER.path if proc_sampler.SAMPLER else None,
+                     'net_samples': netstats.SAMPLER.path if netstats.SAMPLER else None,
+                     **(meta or {})}
+        self.run_id = f"{scenario}-{mode}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        self.rows = {table: {col: [] for col in cols} for table, cols in TABLES.items()}
+
+    def _add(self, table: str, **values) -> None:
+        for col, column in self.rows[table].items():
+            column.append(values.get(col, '' if col in _STRING_COLUMNS else 0))
+
+    def record_phase(self, phase: str, records: dict[str, list[dict]],
+                     node_times: dict[str, float], routes: dict[str, int]) -> None:
+        """
+        records: a phase's advert log records per node (AdvertLog.phase).
+        node_times / routes: per-node convergence time and route count
+        (dv_util.LAST_NODE_TIMES / len() of each node's RouteTable).
+        """
+        for node, recs in records.items():
+            for r in recs:
+                if r.get('kind') == 'advert_size':
+                    self._add('advert', phase=phase, node=node, nbr=r.get('nbr', ''), seq=r.get('seq', 0),
+                              bytes=r.get('bytes', 0), cells=r.get('cells', 0))
+                elif r.get('kind') == 'ibf_decode':
+                    self._add('decode', phase=phase, node=node, nbr=r.get('nbr', ''), path=r.get('path', ''),
+                              cells=r.get('cells', 0), adds=r.get('adds', 0), withdraws=r.get('withdraws', 0))
+        for node in sorted(set(records) | set(node_times) | set(routes)):
+            self._add('node', phase=phase, node=node,
+                      converge_s=node_times.get(node, np.nan), routes=routes.get(node, 0))
+
+    def phase(self, label: str, records: dict[str, list[dict]], nodes: list) -> None:
+        """Record a phase right after its converge_*() call returned (nodes: Mininet hosts)."""
+        import dv_util
+        import netstats
+        import proc_sampler
+        proc_sampler.phase_end(label)
+        for row in netstats.phase_end(label):
+            self._add('link', phase=label, **row)
+        routes = {name: len(table) for name, table in dv_util.poll_route_lists(nodes).items()}
+        self.record_phase(label, records, dict(dv_util.LAST_NODE_TIMES), routes)
+
+    def columns(self) -> dict[str, dict[str, np.ndarray]]:
+        out = {}
+        for table, cols in self.rows.items():
+            out[table] = {col: np.asarray(values, dtype=str if col in _STRING_COLUMNS else
+                                          (float if col == 'converge_s' else np.int64))
+                          for col, values in cols.items()}
+        return out
+
+    def save(self, directory=METRICS_DIR) -> str:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{self.run_id}.npz')
+        arrays = {f'{table}__{col}': values
+                  for table, cols in self.columns().items() for col, values in cols.items()}
+        np.savez_compressed(path, meta=np.asarray(json.dumps(self.meta)), **arrays)
+        _save_parquet(self.columns(), self.meta, os.path.join(directory, self.run_id))
+        _info(f'Metrics written to {path}\n')
+        return path
+
+    def report(self) -> None:
+        for line in summary_lines(summarize([(self.meta, self.columns())])):
+            _info(line + '\n')
+
+def _info(msg: str) -> None:
+    from mininet.log import info
+    info(msg)
+
+def _save_parquet(tables: dict, meta: dict, prefix: str) -> bool:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        return False
+    for table, cols in tables.items():
+        t = pa.table(cols).replace_schema_metadata({'meta': json.dumps(meta)})
+        pq.write_table(t, f'{prefix}.{table}.parquet')
+    return True
+
+def load(path: str) -> tuple[dict, dict[str, dict[str, np.ndarray]]]:
+    """(meta, tables) of a saved run, or None for other .npz files (proc_sampler)."""
+    with np.load(path) as data:
+        if 'meta' not in data.files:
+            return None
+        meta = json.loads(str(data['meta']))
+        tables = defaultdict(dict)
+        for key in data.files:
+            if '__' in key:
+                table, col = key.split('__', 1)
+                tables[table][col] = data[key]
+    return meta, dict(tables)
+
+def _percentiles(values: np.ndarray) -> dict:
+    values = values[~np.isnan(values)] if values.dtype.kind == 'f' else values
+    if len(values) == 0:
+        return {'n': 0}
+    out = {'n': len(values), 'mean': float(np.mean(values)), 'max': float(np.max(values))}
+    for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        out[f'p{p}'] = float(v)
+    return out
+
+def summarize(runs: list[tuple[dict, dict]]) -> dict:
+    """Percentiles per (mode, phase) over any number of runs."""
+    groups = defaultdict(lambda: defaultdict(list))
+    for meta, tables in runs:
+        mode = meta.get('mode', '')
+        for table, metric in (('advert', 'bytes'), ('node', 'converge_s'), ('node', 'routes'),
+                              ('link', 'tx_bytes'), ('link', 'tx_packets')):
+            cols = tables.get(table, {})
+            if metric not in cols:
+                continue
+            for phase in np.unique(cols['phase']):
+                groups[(mode, str(phase))][f'{table}.{metric}'].append(cols[metric][cols['phase'] == phase])
+        decode = tables.get('decode', {})
+        for phase, path in zip(decode.get('phase', []), decode.get('path', [])):
+            groups[(mode, str(phase))][f'decode.{path}'].append(np.ones(1))
+
+    summary = {}
+    for key, metrics in groups.items():
+        summary[key] = {}
+        for name, chunks in metrics.items():
+            values = np.concatenate(chunks)
+            summary[key][name] = {'n': len(values)} if name.startswith('decode.') else _percentiles(values)
+        summary[key]['runs'] = len(runs)
+    return summary
+
+def summary_lines(summary: dict) -> list[str]:
+    lines = []
+    for (mode, phase), metrics in sorted(summary.items()):
+        lines.append(f'[{mode}] {phase} ({metrics["runs"]} runs)')
+        for name, s in sorted(metrics.items()):
+            if name == 'runs':
+                continue
+            if 'p50' in s:
+                pct = ' '.join(f'p{p}={s[f"p{p}"]:.3f}' for p in PERCENTILES)
+                lines.append(f'  {name:24s} n={s["n"]:6d} {pct} max={s["max"]:.3f}')
+            else:
+                lines.append(f'  {name:24s} n={s["n"]:6d}')
+    return lines
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Percentile summary of metrics .npz files')
+    parser.add_argument('paths', nargs='*', default=[os.path.join(METRICS_DIR, '*.npz')])
+    args = parser.parse_args()
+
+    files = sorted({f for pattern in args.paths for f in glob.glob(pattern)})
+    runs = [run for run in map(load, files) if run is not None]
+    for line in summary_lines(summarize(runs)):
+        print(line)
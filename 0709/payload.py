@@ -0,0 +1,39 @@
+import mmap
+import os
+
+# ndnd object 한 segment 의 content 크기
+SEGMENT_SIZE = 8000
+
+# announce 전용 producer 의 기본 payload: segment 1개
+ANNOUNCE_PAYLOAD_SIZE = SEGMENT_SIZE
+
+# tmpfs 가 있으면 그 위에 두어 모든 producer 가 같은 page cache 를 공유하게 함
+PAYLOAD_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else '/tmp'
+
+def payload_path(size: int) -> str:
+    return os.path.join(PAYLOAD_DIR, f'mn-payload-{size}.bin')
+
+def make_payload(size=ANNOUNCE_PAYLOAD_SIZE) -> str:
+    """
+    Create (once) a shared payload file of `size` bytes and return its path.
+    The file is filled through a memory map and lives on tmpfs when
+    available, so every `ndnd put < path` reads the same in-memory pages.
+    """
+    size = max(1, int(size))
+    path = payload_path(size)
+    if os.path.exists(path) and os.path.getsize(path) == size:
+        return path
+
+    tmp = f'{path}.{os.getpid()}'
+    with open(tmp, 'wb+') as f:
+        f.truncate(size)
+        with mmap.mmap(f.fileno(), size) as m:
+            chunk = 1 << 20
+            for off in range(0, size, chunk):
+                n = min(chunk, size - off)
+                m[off:off + n] = os.urandom(n)
+    os.replace(tmp, path)
+    return path
+
+def segments(size: int) -> int:
+    return max(1, -(-size // SEGMENT_SIZE))
@@ -0,0 +1,140 @@
+import csv
+import os
+
+from dv import DEFAULT_NETWORK
+from config import (
+    router_names, per_node, cycle,
+    second_phase_count, CSV_FILE_NAME
+)
+
+PREFIX_DIR = os.path.dirname(__file__)
+
+class PrefixPlan:
+    """
+    Prefix assignment of the CSV experiment, parsed once.
+
+    ndn_prefixes.csv (and file0.txt) are read on the first lookup. The
+    per-router, per-cycle and second-phase slices follow config.py and are
+    precomputed; refresh() re-reads the files only when their mtime
+    changes, so lookups inside a convergence loop do no file I/O or parsing.
+    """
+
+    def __init__(self, base_dir=PREFIX_DIR, csv_name=CSV_FILE_NAME, file0='file0.txt',
+                 routers=router_names, per_node=per_node, cycle=cycle,
+                 second_phase_count=second_phase_count):
+        self.csv_path = os.path.join(base_dir, csv_name)
+        self.file0_path = os.path.join(base_dir, file0)
+        self.routers = list(routers)
+        self.per_node = per_node
+        self.cycle = cycle
+        self.per_node_total = per_node * cycle
+        self.second_phase_count = second_phase_count
+        self._mtimes: tuple = None
+        self.prefixes: list[str] = None
+        self._assigned: dict[tuple[str, int], list[str]] = {}
+        self._second: list[str] = []
+        self._file0: list[tuple[str, str]] = []
+        self._names: dict[tuple, list[str]] = {}
+
+    @staticmethod
+    def _mtime(path: str) -> int:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def refresh(self) -> bool:
+        """Reload if the CSV or file0.txt changed. Returns True if it reloaded."""
+        mtimes = (self._mtime(self.csv_path), self._mtime(self.file0_path))
+        if mtimes == self._mtimes:
+            return False
+
+        self.prefixes = None
+        if mtimes[0] is not None:
+            with open(self.csv_path, 'r') as f:
+                reader = csv.DictReader(f)
+                self.prefixes = [row['prefix'].strip().lstrip('/') for row in reader if row.get('prefix')]
+
+        self._file0 = []
+        if mtimes[1] is not None:
+            with open(self.file0_path, 'r') as f:
+                for line in f:
+                    try:
+                        node_name, prefix = line.strip().split('/', 1)
+                    except ValueError:
+                        continue
+                    self._file0.append((node_name, prefix))
+
+        self._assigned = {}
+        self._second = []
+        self._names = {}
+        if self.prefixes is not None:
+            for idx, router in enumerate(self.routers):
+                for c in range(self.cycle):
+                    start = idx * self.per_node_total + c * self.per_node
+                    self._assigned[(router, c)] = self.prefixes[start:start + self.per_node]
+            start = len(self.routers) * self.per_node_total
+            self._second = self.prefixes[start:start + self.second_phase_count]
+
+        self._mtimes = mtimes
+        return True
+
+    def _ensure(self) -> None:
+        if self._mtimes is None:
+            self.refresh()
+
+    @property
+    def loaded(self) -> bool:
+        self._ensure()
+        return self.prefixes is not None
+
+    @property
+    def min_prefixes(self) -> int:
+        return len(self.routers) * self.per_node_total + self.second_phase_count
+
+    def assigned(self, router: str, cycle_index: int) -> list[str]:
+        """Prefixes (without network/router) that `router` puts in cycle `cycle_index`."""
+        self._ensure()
+        return self._assigned.get((router, cycle_index), [])
+
+    def second_phase(self) -> list[str]:
+        """Prefixes (without network/router) of the second phase."""
+        self._ensure()
+        return self._second
+
+    def cycle_prefixes(self, cycle_index: int, network=DEFAULT_NETWORK) -> list[str]:
+        """Full names of every router's prefixes in one cycle, or None without a CSV."""
+        if not self.loaded:
+            return None
+        key = ('cycle', network, cycle_index)
+        if key not in self._names:
+            self._names[key] = [f'{network}/{router}/{p}'
+                                for router in self.routers for p in self._assigned[(router, cycle_index)]]
+        return self._names[key]
+
+    def all_prefixes(self, network=DEFAULT_NETWORK) -> list[str]:
+        """Full names of every router's prefixes over all cycles, or None without a CSV."""
+        if not self.loaded:
+            return None
+        key = ('all', network)
+        if key not in self._names:
+            self._names[key] = [f'{network}/{router}/{p}'
+                                for router in self.routers
+                                for c in range(self.cycle) for p in self._assigned[(router, c)]]
+        return self._names[key]
+
+    def new_prefixes(self, router='a', network=DEFAULT_NETWORK) -> list[str]:
+        """Full names of the second-phase prefixes, or None without a CSV."""
+        if not self.loaded:
+            return None
+        key = ('new', network, router)
+        if key not in self._names:
+            self._names[key] = [f'{network}/{router}/{p}' for p in self._second]
+        return self._names[key]
+
+    def file0_prefixes(self, network=DEFAULT_NETWORK) -> list[str]:
+        self._ensure()
+        key = ('file0', network)
+        if key not in self._names:
+            self._names[key] = [f'{network}/{node_name}/{prefix}' for node_name, prefix in self._file0]
+        return self._names[key]
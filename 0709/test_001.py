@@ -92,11 +92,11 @@ import time
 
 from mininet.log import info
 from minindn.minindn import Minindn
-from minindn.apps.app_manager import AppManager
 from minindn.apps.nfd import Nfd
 
 from fw import NDNd_FW
 import dv_util
+import readiness
 
 PREFIX_FILE_NAME = 'file0.txt'
 
@@ -114,7 +114,7 @@ def scenario(ndn: Minindn, fw=None, network='/minindn'):
     """
 
     info('Starting forwarder on nodes\n')
-    AppManager(ndn, ndn.net.hosts, fw)
+    dv_util.start_forwarder(ndn, fw)
 
     dv_util.setup(ndn, network=network)
 
@@ -131,6 +131,7 @@ def scenario(ndn: Minindn, fw=None, network='/minindn'):
     os.system(f'dd if=/dev/urandom of={test_file} bs=10M count=1')
 
     # 파일에서 읽은 각 prefix에 대해 put 실행
+    announced = {}
     for line in lines:
         try:
             # 'node1/prefixA' → node_name='node1', prefix='prefixA'
@@ -152,11 +153,12 @@ def scenario(ndn: Minindn, fw=None, network='/minindn'):
         cmd = f'ndnd put --expose "{full_prefix}" < {test_file} &'
         info(f'{node.name} {cmd}\n')
         node.cmd(cmd)
+        announced.setdefault(node, []).append(full_prefix)
         time.sleep(0.5)
 
     # 모든 put 작업이 안정화되도록 대기
     info('Waiting for all put operations to settle\n')
-    time.sleep(3)
+    readiness.wait_producers(announced)
     info('All put operations completed.\n')
 
     # convergence 확인
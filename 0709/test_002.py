@@ -4,7 +4,6 @@ import time
 
 from mininet.log import info
 from minindn.minindn import Minindn
-from minindn.apps.app_manager import AppManager
 
 from fw import NDNd_FW
 import dv_util
@@ -27,7 +26,7 @@ def scenario(ndn: Minindn):
     downIntf.config(loss=99.99)
 
     info('Starting forwarder on nodes\n')
-    AppManager(ndn, ndn.net.hosts, NDNd_FW)
+    dv_util.start_forwarder(ndn, NDNd_FW)
 
     dv_util.setup(ndn)
     dv_util.converge(others)
@@ -117,23 +117,23 @@
 #                 out.write("[No advert log found]\n")
 
 
-import csv
 import os
-import time
 
 from mininet.log import info
 from minindn.minindn import Minindn
-from minindn.apps.app_manager import AppManager
 from minindn.apps.nfd import Nfd
 
 from fw import NDNd_FW
 import dv_util
-from config import (
-    router_names, per_node, cycle, per_node_total,
-    second_phase_count, CSV_FILE_NAME, NETWORK_PREFIX
-)
+import readiness
+from announce import announce, RateLimiter, ANNOUNCE_RATE, ANNOUNCE_BURST
+from payload import make_payload, ANNOUNCE_PAYLOAD_SIZE
+from advert_log import AdvertLog
+from metrics import Metrics, METRICS_DIR
+from config import router_names, cycle, CSV_FILE_NAME, NETWORK_PREFIX
 
 PREFIX_DIR = os.path.dirname(__file__)  # prefix 파일이 있는 디렉토리
+FINAL_ADVERT_LOG = '/tmp/final_advert_log_ndnd_ibf2.txt'
 
 def scenario_ndnd_fw(ndn: Minindn):
     scenario(ndn, fw=NDNd_FW)
@@ -141,94 +141,92 @@ def scenario_ndnd_fw(ndn: Minindn):
 def scenario_nfd(ndn: Minindn):
     scenario(ndn, fw=Nfd)
 
-def scenario(ndn: Minindn, fw=None, network=NETWORK_PREFIX):
+def scenario(ndn: Minindn, fw=None, network=NETWORK_PREFIX,
+             announce_rate=ANNOUNCE_RATE, announce_burst=ANNOUNCE_BURST,
+             payload_size=ANNOUNCE_PAYLOAD_SIZE, new_payload_size=None,
+             mode='ibf', metrics_dir=METRICS_DIR):
+    """
+    payload_size / new_payload_size: bytes served by each producer in the
+    first and second phase (new_payload_size defaults to payload_size).
+    The default is a single segment; 10 * 1024 * 1024 reproduces the old
+    10 MB /tmp/test.bin runs.
+    mode: label of the ndnd build under test ('ibf' or 'dv' baseline),
+    stored with the per-phase metrics written to metrics_dir.
+    Returns the convergence time of every phase in seconds.
+    """
     info('Starting forwarder on nodes\n')
-    AppManager(ndn, ndn.net.hosts, fw)
+    dv_util.start_forwarder(ndn, fw)
 
     # Distance Vector 초기화
     dv_util.setup(ndn, network=network)
 
-    # put에 사용할 테스트 파일 생성
-    test_file = '/tmp/test.bin'
-    if not os.path.exists(test_file):
-        os.system(f'dd if=/dev/urandom of={test_file} bs=10M count=1')
+    # 노드별 advert 로그를 phase 단위로 이어서 읽는다 (새로 쓰인 부분만)
+    advert_log = AdvertLog(ndn.net.hosts)
+    metrics = Metrics('test_ibf_0709', mode, {'nodes': len(ndn.net.hosts), 'payload_size': payload_size, 'cycles': cycle})
+    times = {}
+
+    # put에 사용할 테스트 파일 생성 (phase 별 크기, 공유 메모리)
+    test_file = make_payload(payload_size)
+    new_test_file = make_payload(new_payload_size or payload_size)
 
     ########## ✅ STEP 1: CSV에서 prefix 읽어오기 ##########
-    csv_path = os.path.join(PREFIX_DIR, CSV_FILE_NAME)
-    with open(csv_path, 'r') as csvfile:
-        reader = csv.DictReader(csvfile)
-        all_prefixes = [row['prefix'].strip().lstrip('/') for row in reader if row['prefix'].strip()]
+    plan = dv_util.PLAN
+    plan.refresh()
+    if not plan.loaded:
+        raise FileNotFoundError(plan.csv_path)
 
-    expected_min_prefixes = len(router_names) * per_node_total + second_phase_count
-    if len(all_prefixes) < expected_min_prefixes:
+    expected_min_prefixes = plan.min_prefixes
+    if len(plan.prefixes) < expected_min_prefixes:
         raise ValueError(f"{CSV_FILE_NAME}에 최소 {expected_min_prefixes}개의 prefix가 필요합니다.")
 
     ########## ✅ STEP 2: 각 노드에 2사이클에 걸쳐 put ##########
+    limiter = RateLimiter(announce_rate, announce_burst)
     for c in range(cycle):
         info(f'\n>>> Starting put cycle {c + 1}\n')
+        announced = {}
         for idx, router in enumerate(router_names):
             node = next((n for n in ndn.net.hosts if n.name == router), None)
             if not node:
                 info(f'[WARN] Node not found: {router}\n')
                 continue
 
-            base_idx = idx * per_node_total
-            start_idx = base_idx + c * per_node
-            end_idx = start_idx + per_node
-
-            assigned = all_prefixes[start_idx:end_idx]
-            for prefix in assigned:
-                full_prefix = f'{network}/{router}/{prefix}'
-                cmd = f'ndnd put --expose "{full_prefix}" < {test_file} &'
-                info(f'[Cycle {c + 1}] {router} {cmd}\n')
-                node.cmd(cmd)
-                time.sleep(2)
+            assigned = [f'{network}/{router}/{prefix}' for prefix in plan.assigned(router, c)]
+            info(f'[Cycle {c + 1}] {router}: {len(assigned)} prefixes\n')
+            announce(node, assigned, test_file, limiter)
+            announced[node] = assigned
 
         info(f'Waiting for put cycle {c + 1} to settle\n')
-        time.sleep(5)
+        readiness.wait_producers(announced, f'producers (cycle {c + 1})')
 
         ########## ✅ STEP 3: 1차 수렴 ##########
         info('Running routing convergence...\n')
-        dv_util.converge_ibf_cycle(ndn.net.hosts, cycle_index=c, network=network)
+        times[f'cycle_{c + 1}'] = dv_util.converge_ibf_cycle(ndn.net.hosts, cycle_index=c, network=network)
         info('Routing convergence completed.\n')
-        write_advert_logs_to_final(ndn, "1차 수렴")
+        label = f"1차 수렴 ({c + 1}사이클)"
+        metrics.phase(label, advert_log.phase(label, FINAL_ADVERT_LOG), ndn.net.hosts)
 
     
 
     ########## ✅ STEP 4: a 노드가 5개 prefix 추가 put ##########
     node_a = next((n for n in ndn.net.hosts if n.name == 'a'), None)
     if node_a:
-        start_idx = len(router_names) * per_node_total
-        new_prefixes = all_prefixes[start_idx:start_idx + second_phase_count]
+        new_prefixes = [f'{network}/a/{prefix}' for prefix in plan.second_phase()]
 
         info('Putting 5 new prefixes via node a\n')
-        for prefix in new_prefixes:
-            full_prefix = f'{network}/a/{prefix}'
-            cmd = f'ndnd put --expose "{full_prefix}" < {test_file} &'
-            info(f'a {cmd}\n')
-            node_a.cmd(cmd)
-            time.sleep(0.5)
+        announce(node_a, new_prefixes, new_test_file, limiter)
 
         info('Waiting for new put operations to settle\n')
-        time.sleep(1)
+        readiness.wait_producers({node_a: new_prefixes}, 'new producers')
 
         info('Running second routing convergence...\n')
-        dv_util.converge_new_prefix(ndn.net.hosts, network=network)
+        times['new_prefix'] = dv_util.converge_new_prefix(ndn.net.hosts, network=network)
         info('Second routing convergence completed.\n')
-        write_advert_logs_to_final(ndn, "2차 수렴")
+        metrics.phase("2차 수렴", advert_log.phase("2차 수렴", FINAL_ADVERT_LOG), ndn.net.hosts)
     else:
         info('[WARN] node a not found. Skipping second phase.\n')
 
+    advert_log.report_total()
+    metrics.report()
+    metrics.save(metrics_dir)
     info('All put and convergence steps completed.\n')
-
-def write_advert_logs_to_final(ndn, phase_title, output_file="/tmp/final_advert_log_ndnd_ibf2.txt"):
-    with open(output_file, "a") as out:
-        out.write(f"\n===== {phase_title} =====\n")
-        for node in ndn.net.hosts:
-            node_log_path = f"/tmp/minindn/{node.name}/advert_log.txt"
-            out.write(f"\n--- Node {node.name} ---\n")
-            if os.path.exists(node_log_path):
-                with open(node_log_path, "r") as node_log:
-                    out.write(node_log.read())
-            else:
-                out.write("[No advert log found]\n")
+    return times
@@ -1,9 +1,11 @@
 package tlv
 
 import (
+	"bytes"
 	"errors"
 	"fmt"
-	"reflect"
+	"math"
+	"sync"
 
 	enc "github.com/named-data/ndnd/std/encoding"
 	"github.com/named-data/ndnd/std/log"
@@ -35,333 +37,787 @@ func NewIBF() *IBF {
 	return &IBF{Cells: cells}
 }
 
-func extractIBFIndexesFromKey(key []byte) [3]int {
-	h1 := murmur3.SeedSum32(0xA1A1A1A1, key)
-	h2 := murmur3.SeedSum32(0xB2B2B2B2, key)
-	h3 := murmur3.SeedSum32(0xC3C3C3C3, key)
+// IBF_Levels are the cell counts an IBF advert may use. The sender picks
+// the smallest level that fits the difference it expects. A cell carries a
+// key of up to IBF_KeyWidth bytes or more, so the upper levels can exceed
+// one UDP datagram; the sender steps down with IBFLevelBelow until the
+// encoded IBF fits (IBF_MaxDatagram).
+var IBF_Levels = []int{IBF_CellCount, 2 * IBF_CellCount, 4 * IBF_CellCount, 8 * IBF_CellCount}
+
+// IBF_MaxDatagram is the largest UDP payload over IPv4.
+const IBF_MaxDatagram = 65507
+
+// IBF_CellsPerDiff is the cells the sender budgets per expected
+// difference entry. IBF_PeelThreshold is the cells per estimated entry
+// below which the receiver fetches the full advert instead of peeling.
+//
+// Both come from ibf_bench.py at the real levels (k=3, half of the
+// difference withdrawals, 200-1000 trials per point), decode rate by
+// cells per entry:
+//
+//	cells   5.0   4.0   3.3   2.5   2.0
+//	50      95%   92%   89%   82%    -
+//	100     96%   95%   89%   86%   78%
+//	200     95%   93%   94%   87%   77%
+//	400     92%   92%   84%   82%   79%
+//
+// With additions only the same points decode in 94-100% down to 2.0 and
+// collapse below ~1.3 (50 cells: 88% at 1.67, 23% at 1.25). 4 cells per
+// entry keeps every level above ~91%; below 2 cells per entry a decode
+// fails about one time in four, so fetching directly is cheaper.
+const (
+	IBF_CellsPerDiff  = 4.0
+	IBF_PeelThreshold = 2.0
+)
+
+// IBFCellsFor returns the smallest level with room for diff entries, or
+// the largest level.
+func IBFCellsFor(diff int) int {
+	for _, cells := range IBF_Levels {
+		if float64(cells) >= IBF_CellsPerDiff*float64(diff) {
+			return cells
+		}
+	}
+	return IBF_Levels[len(IBF_Levels)-1]
+}
+
+// IBFLevelBelow returns the next smaller level, or 0 below the smallest.
+func IBFLevelBelow(cells int) int {
+	below := 0
+	for _, c := range IBF_Levels {
+		if c >= cells {
+			break
+		}
+		below = c
+	}
+	return below
+}
 
+func IBFLevelValid(cells int) bool {
+	for _, c := range IBF_Levels {
+		if c == cells {
+			return true
+		}
+	}
+	return false
+}
+
+// IBFDecodable reports whether an estimated difference can be peeled from
+// an IBF of the given size.
+func IBFDecodable(cells int, estimate float64) bool {
+	return estimate*IBF_PeelThreshold <= float64(cells)
+}
+
+func keyHashes(key []byte) [3]uint32 {
+	return [3]uint32{
+		murmur3.SeedSum32(0xA1A1A1A1, key),
+		murmur3.SeedSum32(0xB2B2B2B2, key),
+		murmur3.SeedSum32(0xC3C3C3C3, key),
+	}
+}
+
+func cellIndexes(h [3]uint32, cells int) [3]int {
 	return [3]int{
-		int(h1 % uint32(IBF_CellCount)),
-		int(h2 % uint32(IBF_CellCount)),
-		int(h3 % uint32(IBF_CellCount)),
+		int(h[0] % uint32(cells)),
+		int(h[1] % uint32(cells)),
+		int(h[2] % uint32(cells)),
 	}
 }
 
-/************************** IBF Program ****************************/
-func (adv *Advertisement) IBFprogram() *IBF {
-	fmt.Printf("IBF program / ")
+func extractIBFIndexesFromKey(key []byte) [3]int {
+	return cellIndexes(keyHashes(key), IBF_CellCount)
+}
 
-	ibf := NewIBF()
+/************************** IBF Buffer ****************************/
+
+// IBF_KeyWidth is the fixed slot width of a cell key in an IBFBuffer.
+// Keys are XORed right-aligned into their slot, so any encoded AdvEntry up
+// to this long is handled in place; a longer key widens the buffer once.
+const IBF_KeyWidth = 256
+
+// IBFBuffer is the working form of an IBF. All cell keys live in one
+// contiguous array of fixed-width slots and insert/remove XOR in place, so
+// programming and decoding do not allocate per key. It is converted to the
+// wire IBF (IBF()) and loaded back from it (Load) only at the edges.
+type IBFBuffer struct {
+	width  int
+	keys   []byte // slot i is keys[i*width : (i+1)*width]
+	sigs   []uint64
+	counts []int64
+
+	// backing of the wire view returned by IBF()
+	cells []IBFEntry
+	ptrs  []*IBFEntry
+}
 
-	for _, entry := range adv.Entries {
-		data := entry.Encode().Join()
-		// hash32 := murmur3.Sum32(data)
-		// hash32 := crc32.ChecksumIEEE(data)
-		// indexes := extractIBFIndexes(hash32)
+func NewIBFBuffer(cellCount int) *IBFBuffer {
+	b := &IBFBuffer{width: IBF_KeyWidth}
+	b.resize(cellCount)
+	return b
+}
 
-		key := data
-		// sig := uint64((hash32 >> 24) & 0xFFFF)
-		// fmt.Printf("	[%d]번째 : [%d][%d][%d] key: %s\n", i+1, h1, h2, h3, entry.Destination.Name)
-		indexes := extractIBFIndexesFromKey(data)
-		sigHash := murmur3.SeedSum32(0xD4D4D4D4, data)
-		sig := uint64((sigHash >> 24) & 0xFFFF)
+var ibfBufferPool = sync.Pool{
+	New: func() any { return NewIBFBuffer(IBF_CellCount) },
+}
 
-		h1, h2, h3 := indexes[0], indexes[1], indexes[2]
+// GetIBFBuffer returns an empty buffer of cellCount cells from the pool.
+// Pooled buffers keep whatever size they were last loaded at, so the size
+// is always set here. Release it with PutIBFBuffer once nothing references
+// its IBF() view or decoded keys.
+func GetIBFBuffer(cellCount int) *IBFBuffer {
+	b := ibfBufferPool.Get().(*IBFBuffer)
+	b.resize(cellCount)
+	return b
+}
 
-		ibf.InsertAt(h1, key, sig)
-		ibf.InsertAt(h2, key, sig)
-		ibf.InsertAt(h3, key, sig)
+func PutIBFBuffer(b *IBFBuffer) {
+	ibfBufferPool.Put(b)
+}
 
+func (b *IBFBuffer) resize(cellCount int) {
+	if cap(b.counts) >= cellCount && cap(b.keys) >= cellCount*b.width {
+		b.keys = b.keys[:cellCount*b.width]
+		b.sigs = b.sigs[:cellCount]
+		b.counts = b.counts[:cellCount]
+	} else {
+		b.keys = make([]byte, cellCount*b.width)
+		b.sigs = make([]uint64, cellCount)
+		b.counts = make([]int64, cellCount)
 	}
-	return ibf
+	b.Reset()
 }
 
-func (ibf *IBF) InsertAt(idx int, key []byte, sig uint64) {
-	cell := ibf.Cells[idx]
+// Reset clears every cell without releasing memory.
+func (b *IBFBuffer) Reset() {
+	clear(b.keys)
+	clear(b.sigs)
+	clear(b.counts)
+}
 
-	if cell.KeyField == nil {
-		cell.KeyField = make([]byte, len(key))
-	}
+func (b *IBFBuffer) Len() int {
+	return len(b.counts)
+}
 
-	cell.KeyField = xorBytesNew(cell.KeyField, key)
-	cell.SigField = cell.SigField ^ sig
-	cell.Count++
+func (b *IBFBuffer) slot(i int) []byte {
+	return b.keys[i*b.width : (i+1)*b.width]
 }
 
-func xorBytesNew(a, b []byte) []byte {
-	n := max(len(a), len(b)) // 둘 중 긴 길이에 맞춘다
-	result := make([]byte, n)
+// widen re-lays the slots out at a larger width, keeping them right-aligned.
+func (b *IBFBuffer) widen(width int) {
+	n := b.Len()
+	keys := make([]byte, n*width)
+	for i := 0; i < n; i++ {
+		copy(keys[(i+1)*width-b.width:(i+1)*width], b.slot(i))
+	}
+	b.keys, b.width = keys, width
+}
 
-	// 뒤에서부터 맞춰서 복사
-	copy(result[n-len(a):], a)
-	for i := 0; i < len(b); i++ {
-		result[n-len(b)+i] ^= b[i]
+// xorKey XORs key right-aligned into slot i.
+func (b *IBFBuffer) xorKey(i int, key []byte) {
+	if len(key) > b.width {
+		b.widen(max(2*b.width, len(key)))
+	}
+	dst := b.slot(i)[b.width-len(key):]
+	for j := range key {
+		dst[j] ^= key[j]
 	}
-	return result
 }
 
-/************************** dIBF generate ****************************/
-func DIBFgenerate(senderIBF, localIBF *IBF) *IBF {
-	fmt.Printf(" dIBF 생성 ")
+// Insert adds (sign=1) or removes (sign=-1) key at each of its indexes.
+func (b *IBFBuffer) Insert(key []byte, sig uint64, indexes [3]int, sign int64) {
+	for _, i := range indexes {
+		b.xorKey(i, key)
+		b.sigs[i] ^= sig
+		b.counts[i] += sign
+	}
+}
 
-	// PrintIBF("Sender IBF", senderIBF)
-	// PrintIBF("Local IBF", localIBF)
+// Load copies a received IBF into the buffer, replacing its contents.
+func (b *IBFBuffer) Load(ibf *IBF) {
+	if len(ibf.Cells) != b.Len() {
+		b.resize(len(ibf.Cells))
+	} else {
+		b.Reset()
+	}
+	for i, cell := range ibf.Cells {
+		b.xorKey(i, cell.KeyField)
+		b.sigs[i] = cell.SigField
+		b.counts[i] = cell.Count
+	}
+}
 
-	dibf := NewIBF()
+// Subtract removes every cell of ibf from the buffer in place.
+func (b *IBFBuffer) Subtract(ibf *IBF) error {
+	if len(ibf.Cells) != b.Len() {
+		return fmt.Errorf("IBF cell count mismatch: %d != %d", len(ibf.Cells), b.Len())
+	}
+	for i, cell := range ibf.Cells {
+		b.xorKey(i, cell.KeyField)
+		b.sigs[i] ^= cell.SigField
+		b.counts[i] -= cell.Count
+	}
+	return nil
+}
 
-	if len(senderIBF.Cells) == 0 || len(localIBF.Cells) == 0 {
-		log.Error(nil, "DIBFgenerate: 셀 길이가 0",
-			"remoteLen", fmt.Sprintf("%d", len(senderIBF.Cells)),
-			"localLen", fmt.Sprintf("%d", len(localIBF.Cells)))
-		return &IBF{Cells: []*IBFEntry{}}
+// SubtractBuffer removes every cell of o from the buffer in place.
+func (b *IBFBuffer) SubtractBuffer(o *IBFBuffer) error {
+	if o.Len() != b.Len() {
+		return fmt.Errorf("IBF cell count mismatch: %d != %d", o.Len(), b.Len())
+	}
+	if o.width > b.width {
+		b.widen(o.width)
 	}
+	for i := 0; i < b.Len(); i++ {
+		b.xorKey(i, o.slot(i))
+		b.sigs[i] ^= o.sigs[i]
+		b.counts[i] -= o.counts[i]
+	}
+	return nil
+}
 
-	for i := 0; i < IBF_CellCount; i++ {
-		cell1 := senderIBF.Cells[i]
-		cell2 := localIBF.Cells[i]
-
-		// key: XOR (길이 다를 수 있음)
-		dKey := xorBytesNew(cell1.KeyField, cell2.KeyField)
-		dSig := cell1.SigField ^ cell2.SigField
-		dCount := cell1.Count - cell2.Count
-
-		// 새 셀에 설정
-		dibf.Cells[i] = &IBFEntry{
-			KeyField: dKey,
-			SigField: dSig,
-			Count:    dCount,
+// EstimateDiff estimates how many entries the buffer holds from the share
+// of non-empty cells: with k=3 hashes, d entries leave a cell empty with
+// probability (1-1/m)^(3d). It returns +Inf when every cell is occupied.
+func (b *IBFBuffer) EstimateDiff() float64 {
+	m := b.Len()
+	occupied := 0
+	for i := 0; i < m; i++ {
+		if b.counts[i] != 0 || b.sigs[i] != 0 || len(trimPadding(b.slot(i))) != 0 {
+			occupied++
 		}
 	}
-
-	// PrintIBF("dIBF (차이)", dibf)
-	// return &IBF{Cells: dcells}
-	return dibf
+	if occupied == m {
+		return math.Inf(1)
+	}
+	return -float64(m) / 3 * math.Log(1-float64(occupied)/float64(m))
 }
 
-func PrintIBF(name string, ibf *IBF) {
-	fmt.Printf("\n========== %s ==========\n", name)
-	for i, cell := range ibf.Cells {
-		fmt.Printf("[%02d] Count: %d, Sig: 0x%x, Key: %x\n", i, cell.Count, cell.SigField, cell.KeyField)
+// IBF returns the wire form of the buffer. KeyFields alias the buffer with
+// their zero padding trimmed, so the view is only valid until the buffer is
+// modified or returned to the pool.
+func (b *IBFBuffer) IBF() *IBF {
+	n := b.Len()
+	if cap(b.cells) < n {
+		b.cells = make([]IBFEntry, n)
+		b.ptrs = make([]*IBFEntry, n)
 	}
-	fmt.Println("===============================\n")
+	b.cells, b.ptrs = b.cells[:n], b.ptrs[:n]
+	for i := 0; i < n; i++ {
+		b.cells[i] = IBFEntry{
+			KeyField: trimPadding(b.slot(i)),
+			SigField: b.sigs[i],
+			Count:    b.counts[i],
+		}
+		b.ptrs[i] = &b.cells[i]
+	}
+	return &IBF{Cells: b.ptrs}
 }
 
-/************************** dIBF Decoding ****************************/
-func (ibf *IBF) DIBFdecode() ([]*AdvEntry, []*AdvEntry, error) {
-	fmt.Println("Decoding start!")
+/************************** IBF Program ****************************/
+func (adv *Advertisement) IBFprogram() *IBF {
+	b := NewIBFBuffer(IBF_CellCount)
+	adv.IBFinsert(b, 1)
+	return b.IBF()
+}
 
-	var (
-		sigMismatchCount int
-		t1CaseCount      int
-		t2CaseCount      int
-	)
+// IBFinsert adds (sign=1) or removes (sign=-1) every entry of adv in b.
+func (adv *Advertisement) IBFinsert(b *IBFBuffer, sign int64) {
+	fmt.Printf("IBF program / ")
 
-	pureList := updatePureList(ibf)
+	for _, entry := range adv.Entries {
+		m := ibfEntries.get(entry)
+		b.Insert(m.key, m.sig, cellIndexes(m.hashes, b.Len()), sign)
+	}
+}
 
-	var decodedAddEntries []*AdvEntry
-	var decodedWithdrawEntries []*AdvEntry
+/************************** Entry memo ****************************/
+
+// entryMemo is the IBF key material of one AdvEntry: its encoded bytes,
+// signature and index hashes, plus the entry itself for decoding.
+type entryMemo struct {
+	id     entryID
+	key    []byte
+	sig    uint64
+	hashes [3]uint32
+	entry  *AdvEntry
+	refs   int
+}
 
-	for {
-		found := false
+func newEntryMemo(id entryID, entry *AdvEntry) *entryMemo {
+	key := entry.Encode().Join()
+	return &entryMemo{id: id, key: key, sig: keySig(key), hashes: keyHashes(key), entry: entry}
+}
 
-		for i := 0; i < len(ibf.Cells); i++ {
+// entryID identifies an entry by the hashes of its destination and next hop
+// names and its cost, so looking an entry up neither encodes nor formats it
+// and does not allocate.
+type entryID struct {
+	dest    uint64
+	nextHop uint64
+	cost    uint64
+}
 
-			if !pureList[i] { // pureList 0이면 스킵
-				continue
-			}
+func entryIDOf(e *AdvEntry) entryID {
+	return entryID{dest: e.Destination.Name.Hash(), nextHop: e.NextHop.Name.Hash(), cost: e.Cost}
+}
 
-			cell := ibf.Cells[i]
-			key := trimPadding(cell.KeyField) //adventry.Encode().Join()
+// matches guards against a hash collision between two different entries.
+func (m *entryMemo) matches(e *AdvEntry) bool {
+	return m.entry.Destination.Name.Equal(e.Destination.Name) && m.entry.NextHop.Name.Equal(e.NextHop.Name)
+}
 
-			if len(key) == 0 { // KeyField가 비어있으면 스킵
-				pureList[i] = false
-				continue
-			}
+// entryCacheIdle bounds the memos kept for entries no IBFView holds.
+const entryCacheIdle = 4096
+
+// entryCache shares entry memos between IBF views and decoding. A memo is
+// keyed by destination, next hop and cost, so any change to those is a new
+// memo; it lives as long as some IBFView holds the entry. Memos created by
+// get() for entries no view holds are kept too, up to entryCacheIdle.
+type entryCache struct {
+	mutex sync.Mutex
+	byID  map[entryID]*entryMemo
+	byKey map[string]*entryMemo
+	idle  int
+}
 
-			adventry, err := ParseAdvEntry(enc.NewWireView(enc.Wire{key}), false)
-			if err != nil {
-				return nil, nil, fmt.Errorf(" fail Parse : %w \n ", err)
-			}
+var ibfEntries = &entryCache{
+	byID:  make(map[entryID]*entryMemo),
+	byKey: make(map[string]*entryMemo),
+}
 
-			// hash32 := murmur3.Sum32(key)
-			// hash32 := crc32.ChecksumIEEE(key)
-			// indexes := extractIBFIndexes(hash32)
-			indexes := extractIBFIndexesFromKey(key)
+// lookup returns the cached memo of entry, or nil. Callers hold c.mutex.
+func (c *entryCache) lookup(id entryID, entry *AdvEntry) *entryMemo {
+	if m, ok := c.byID[id]; ok && m.matches(entry) {
+		return m
+	}
+	return nil
+}
 
-			h1, h2, h3 := indexes[0], indexes[1], indexes[2]
+// store caches m unless another memo took its id meanwhile, and returns the
+// cached memo. Callers hold c.mutex.
+func (c *entryCache) store(m *entryMemo) *entryMemo {
+	if cur, ok := c.byID[m.id]; ok {
+		if cur.matches(m.entry) {
+			return cur
+		}
+		// 해시 충돌: 캐시하지 않고 그대로 쓴다
+		return m
+	}
+	c.byID[m.id] = m
+	c.byKey[string(m.key)] = m
+	c.idle++
+	return m
+}
 
-			// fmt.Printf(" 		 h1, h2, h3 : [%d],[%d],[%d] \n", h1, h2, h3)
+// get returns the memo of entry, computing and caching it on a miss.
+func (c *entryCache) get(entry *AdvEntry) *entryMemo {
+	id := entryIDOf(entry)
+	c.mutex.Lock()
+	m := c.lookup(id, entry)
+	c.mutex.Unlock()
+	if m != nil {
+		return m
+	}
+	// 인코딩/해시는 lock 밖에서
+	m = newEntryMemo(id, entry)
+	c.mutex.Lock()
+	defer c.mutex.Unlock()
+	m = c.store(m)
+	if c.idle > entryCacheIdle {
+		c.dropIdle()
+	}
+	return m
+}
 
-			// 해당 key의 sig
-			sigHash := murmur3.SeedSum32(0xD4D4D4D4, key)
-			expectedSig := uint64((sigHash >> 24) & 0xFFFF)
-			// expectedSig := uint64(uint16((hash32 >> 24) & 0xFFFF))
+// dropIdle removes every memo no IBFView holds. Callers hold c.mutex.
+func (c *entryCache) dropIdle() {
+	for id, m := range c.byID {
+		if m.refs <= 0 {
+			delete(c.byID, id)
+			delete(c.byKey, string(m.key))
+		}
+	}
+	c.idle = 0
+}
 
-			// Fake Pure Cell 체크
-			isFakePure := false
+// byKeyBytes returns the memo of an encoded entry, or nil.
+func (c *entryCache) byKeyBytes(key []byte) *entryMemo {
+	c.mutex.Lock()
+	defer c.mutex.Unlock()
+	return c.byKey[string(key)]
+}
 
-			if cell.SigField != expectedSig {
-				sigMismatchCount++
-				isFakePure = true
-				continue
-			}
+// acquire returns the memo of entry and marks it held by one more view.
+// The memo is not cached when its id collides with another entry's, so
+// release must be given the memo acquire returned.
+func (c *entryCache) acquire(id entryID, entry *AdvEntry) *entryMemo {
+	c.mutex.Lock()
+	m := c.lookup(id, entry)
+	c.mutex.Unlock()
+	if m == nil {
+		m = newEntryMemo(id, entry)
+	}
+	c.mutex.Lock()
+	defer c.mutex.Unlock()
+	m = c.store(m)
+	if m.refs == 0 && c.byID[id] == m {
+		c.idle--
+	}
+	m.refs++
+	return m
+}
 
-			// 2. T1 case: 해당 셀이 자기 자신의 해시 index에 속하지 않음
-			if i != h1 && i != h2 && i != h3 {
-				t1CaseCount++
-				isFakePure = true
-			}
+func (c *entryCache) release(m *entryMemo) {
+	c.mutex.Lock()
+	defer c.mutex.Unlock()
+	if m.refs--; m.refs <= 0 && c.byID[m.id] == m {
+		delete(c.byID, m.id)
+		delete(c.byKey, string(m.key))
+	}
+}
 
-			if isFakePure {
-				pureList[i] = false
-				continue
-			}
+/************************** Incremental IBF ****************************/
 
-			// T2 case 확인 후 append
-			if cell.Count == 1 {
-				// withdraw 리스트에 존재한다면 T2Case
-				if contains(decodedWithdrawEntries, adventry) {
-					t2CaseCount++
-					decodedWithdrawEntries = removeEntry(decodedWithdrawEntries, adventry)
-				} else if !contains(decodedAddEntries, adventry) {
-					decodedAddEntries = append(decodedAddEntries, adventry)
-				}
-			} else if cell.Count == -1 {
-				// add 리스트에 존재한다면 T2Case
-				if contains(decodedAddEntries, adventry) {
-					t2CaseCount++
-					decodedAddEntries = removeEntry(decodedAddEntries, adventry)
-				} else if !contains(decodedWithdrawEntries, adventry) {
-					decodedWithdrawEntries = append(decodedWithdrawEntries, adventry)
-				}
-			}
-			found = true
+// ibfViewEntry is an entry held by an IBFView.
+type ibfViewEntry struct {
+	memo *entryMemo
+	gen  uint64
+}
 
-			// XOR로 주변 셀에서 제거
-			removeKeyFromCell(ibf.Cells[h1], key, expectedSig)
-			removeKeyFromCell(ibf.Cells[h2], key, expectedSig)
-			removeKeyFromCell(ibf.Cells[h3], key, expectedSig)
+// IBFView keeps an IBFBuffer in step with an advertisement across calls.
+// The IBF is linear, so Sync only inserts entries that appeared and deletes
+// entries that went away: encoding, key hashing, XOR work and allocations
+// are O(changes) per advert. Sync still walks the whole advert to find the
+// changes, one name-hash lookup per unchanged entry, so a call is O(entries)
+// in cheap lookups; the RIB that could report changes directly lives
+// upstream in ndnd and is not hooked here.
+//
+// Every level the view has been resized to keeps its own buffer, updated
+// by Sync alongside the current one, so switching back to a level is free
+// and only the first visit to a level rebuilds from the memos.
+type IBFView struct {
+	Buf     *IBFBuffer // buffer at the current level
+	levels  map[int]*IBFBuffer
+	entries map[entryID]*ibfViewEntry
+	gen     uint64
+}
 
-			// pureList 갱신
-			pureList = updatePureList(ibf)
-		}
+func NewIBFView() *IBFView {
+	b := NewIBFBuffer(IBF_CellCount)
+	return &IBFView{
+		Buf:     b,
+		levels:  map[int]*IBFBuffer{IBF_CellCount: b},
+		entries: make(map[entryID]*ibfViewEntry),
+	}
+}
 
-		if !found {
-			break
-		}
+// insert adds (sign=1) or removes (sign=-1) m in every level buffer.
+func (v *IBFView) insert(m *entryMemo, sign int64) {
+	for cells, b := range v.levels {
+		b.Insert(m.key, m.sig, cellIndexes(m.hashes, cells), sign)
 	}
+}
 
-	// 디코딩 끝났는데 남은 셀 존재 → 실패
-	leftover := false
-	for i, cell := range ibf.Cells {
-		if cell.Count != 0 {
-			leftover = true
-			fmt.Printf("[Leftover Cell %02d] Count: %d, Sig: 0x%x, Key: %x\n", i, cell.Count, cell.SigField, cell.KeyField)
+// Sync updates the view to hold exactly the entries of adv.
+func (v *IBFView) Sync(adv *Advertisement) (added, removed int) {
+	v.gen++
+	for _, entry := range adv.Entries {
+		id := entryIDOf(entry)
+		if e, ok := v.entries[id]; ok {
+			e.gen = v.gen
+			continue
 		}
+		m := ibfEntries.acquire(id, entry)
+		v.entries[id] = &ibfViewEntry{memo: m, gen: v.gen}
+		v.insert(m, 1)
+		added++
 	}
-	if leftover {
-		return decodedAddEntries, decodedWithdrawEntries, errors.New("cannot fully decode IBF, leftover entries exist")
+	for id, e := range v.entries {
+		if e.gen != v.gen {
+			v.insert(e.memo, -1)
+			ibfEntries.release(e.memo)
+			delete(v.entries, id)
+			removed++
+		}
 	}
+	return added, removed
+}
 
-	return decodedAddEntries, decodedWithdrawEntries, nil
+// Resize switches the view to another cell count, building that level from
+// the memos (no encoding) the first time it is used.
+func (v *IBFView) Resize(cells int) {
+	if b, ok := v.levels[cells]; ok {
+		v.Buf = b
+		return
+	}
+	b := NewIBFBuffer(cells)
+	for _, e := range v.entries {
+		b.Insert(e.memo.key, e.memo.sig, cellIndexes(e.memo.hashes, cells), 1)
+	}
+	v.levels[cells] = b
+	v.Buf = b
 }
 
-func removeKeyFromCell(cell *IBFEntry, key []byte, sig uint64) {
-	n := max(len(cell.KeyField), len(key))
+// Close releases the view's memos and level buffers. A view used after
+// Close starts again from an empty advert.
+func (v *IBFView) Close() {
+	for _, e := range v.entries {
+		ibfEntries.release(e.memo)
+	}
+	*v = *NewIBFView()
+}
 
-	// 패딩해서 동일 길이로 맞추기
-	paddedCellKey := make([]byte, n)
-	paddedKey := make([]byte, n)
+func (v *IBFView) Len() int {
+	return len(v.entries)
+}
 
-	copy(paddedCellKey[n-len(cell.KeyField):], cell.KeyField)
-	copy(paddedKey[n-len(key):], key)
+// InsertAt XORs key into cell idx of a wire IBF, reusing the cell's
+// KeyField when it is already long enough.
+func (ibf *IBF) InsertAt(idx int, key []byte, sig uint64) {
+	cell := ibf.Cells[idx]
+	cell.KeyField = xorInto(cell.KeyField, key)
+	cell.SigField = cell.SigField ^ sig
+	cell.Count++
+}
 
-	// XOR
-	for i := 0; i < n; i++ {
-		paddedCellKey[i] ^= paddedKey[i]
+// xorInto XORs b right-aligned into a, growing a only if b is longer.
+func xorInto(a, b []byte) []byte {
+	if len(b) > len(a) {
+		grown := make([]byte, len(b))
+		copy(grown[len(b)-len(a):], a)
+		a = grown
+	}
+	off := len(a) - len(b)
+	for i := range b {
+		a[off+i] ^= b[i]
 	}
+	return a
+}
 
-	// KeyField 업데이트
-	cell.KeyField = paddedCellKey
+/************************** dIBF generate ****************************/
+func DIBFgenerate(senderIBF, localIBF *IBF) *IBF {
+	fmt.Printf(" dIBF 생성 ")
 
-	// SigField는 그냥 XOR
-	cell.SigField ^= sig
+	if len(senderIBF.Cells) == 0 || len(localIBF.Cells) == 0 {
+		log.Error(nil, "DIBFgenerate: 셀 길이가 0",
+			"remoteLen", fmt.Sprintf("%d", len(senderIBF.Cells)),
+			"localLen", fmt.Sprintf("%d", len(localIBF.Cells)))
+		return &IBF{Cells: []*IBFEntry{}}
+	}
 
-	// Count 업데이트
-	if cell.Count > 0 {
-		cell.Count--
-	} else {
-		cell.Count++
+	b := NewIBFBuffer(len(senderIBF.Cells))
+	b.Load(senderIBF)
+	if err := b.Subtract(localIBF); err != nil {
+		log.Error(nil, "DIBFgenerate", "err", err)
+		return &IBF{Cells: []*IBFEntry{}}
 	}
+	return b.IBF()
 }
 
-func trimPadding(key []byte) []byte {
-	idx := 0
-	for idx < len(key) && key[idx] == 0 {
-		idx++
+func PrintIBF(name string, ibf *IBF) {
+	fmt.Printf("\n========== %s ==========\n", name)
+	for i, cell := range ibf.Cells {
+		fmt.Printf("[%02d] Count: %d, Sig: 0x%x, Key: %x\n", i, cell.Count, cell.SigField, cell.KeyField)
 	}
-	return key[idx:]
+	fmt.Println("===============================\n")
 }
 
-/// T2 error 관련
+/************************** dIBF Decoding ****************************/
 
-func entryEquals(a, b *AdvEntry) bool {
-	return reflect.DeepEqual(a.Destination.Name, b.Destination.Name) &&
-		reflect.DeepEqual(a.NextHop.Name, b.NextHop.Name) &&
-		a.Cost == b.Cost
+// keySig는 key의 서명 값 (IBFprogram과 같은 계산)
+func keySig(key []byte) uint64 {
+	sigHash := murmur3.SeedSum32(0xD4D4D4D4, key)
+	return uint64((sigHash >> 24) & 0xFFFF)
 }
 
-func contains(entries []*AdvEntry, target *AdvEntry) bool {
-	for _, e := range entries {
-		if entryEquals(e, target) {
-			return true
-		}
+// pureKey returns the key of cell i if the cell is pure: count is +-1, the
+// signature matches the key, and i is one of the key's own indexes. Keys
+// already known to ibfEntries come back with their memo and are not
+// rehashed; otherwise the key aliases the cell's slot.
+func (b *IBFBuffer) pureKey(i int) (key []byte, m *entryMemo, reason int) {
+	if b.counts[i] != 1 && b.counts[i] != -1 {
+		return nil, nil, pureNotCandidate
 	}
-	return false
+	key = trimPadding(b.slot(i))
+	if len(key) == 0 {
+		return nil, nil, pureNotCandidate
+	}
+	sig, hashes := uint64(0), [3]uint32{}
+	if m = ibfEntries.byKeyBytes(key); m != nil {
+		key, sig, hashes = m.key, m.sig, m.hashes
+	} else {
+		sig, hashes = keySig(key), keyHashes(key)
+	}
+	if b.sigs[i] != sig {
+		return nil, nil, pureSigMismatch
+	}
+	indexes := cellIndexes(hashes, b.Len())
+	if i != indexes[0] && i != indexes[1] && i != indexes[2] {
+		// T1 case: 해당 셀이 자기 자신의 해시 index에 속하지 않음
+		return nil, nil, pureT1
+	}
+	if m == nil {
+		m = &entryMemo{key: key, sig: sig, hashes: hashes}
+	}
+	return key, m, pureOK
 }
 
-func updatePureList(ibf *IBF) []bool {
-	pureList := make([]bool, len(ibf.Cells))
+const (
+	pureOK = iota
+	pureNotCandidate
+	pureSigMismatch
+	pureT1
+)
 
-	for i, cell := range ibf.Cells {
-		if cell.Count != 1 && cell.Count != -1 {
-			continue
-		}
+// decodedSet keeps decoded entries keyed by their encoded bytes, in decode order.
+type decodedSet struct {
+	order []string
+	byKey map[string]*AdvEntry
+}
 
-		key := trimPadding(cell.KeyField)
-		if len(key) == 0 {
-			continue
+func newDecodedSet() *decodedSet {
+	return &decodedSet{byKey: make(map[string]*AdvEntry)}
+}
+
+func (s *decodedSet) add(k string, e *AdvEntry) {
+	if _, ok := s.byKey[k]; ok {
+		return
+	}
+	s.byKey[k] = e
+	s.order = append(s.order, k)
+}
+
+func (s *decodedSet) remove(k string) bool {
+	if _, ok := s.byKey[k]; !ok {
+		return false
+	}
+	delete(s.byKey, k)
+	return true
+}
+
+func (s *decodedSet) entries() []*AdvEntry {
+	out := make([]*AdvEntry, 0, len(s.byKey))
+	for _, k := range s.order {
+		if e, ok := s.byKey[k]; ok {
+			out = append(out, e)
+			delete(s.byKey, k) // 같은 key가 order에 두 번 있어도 한 번만
 		}
+	}
+	return out
+}
+
+// DIBFdecode peels a copy of the dIBF; the IBF itself is left unchanged.
+func (ibf *IBF) DIBFdecode() ([]*AdvEntry, []*AdvEntry, error) {
+	b := GetIBFBuffer(len(ibf.Cells))
+	defer PutIBFBuffer(b)
+	b.Load(ibf)
+	return b.Decode()
+}
+
+// Decode peels the buffer in place with a worklist of candidate pure cells.
+// Every cell starts as a candidate; after a peel only the key's own cells
+// can change, so only those are re-queued. Each cell is examined O(1)
+// times per peel that touches it, so decoding is O(cells + entries).
+func (b *IBFBuffer) Decode() ([]*AdvEntry, []*AdvEntry, error) {
+	fmt.Println("Decoding start!")
+
+	var (
+		sigMismatchCount int
+		t1CaseCount      int
+		t2CaseCount      int
+	)
+
+	n := b.Len()
+	queue := make([]int, 0, n)
+	queued := make([]bool, n)
+	for i := 0; i < n; i++ {
+		queue = append(queue, i)
+		queued[i] = true
+	}
 
-		// hash32 := murmur3.Sum32(key)
-		// hash32 := crc32.ChecksumIEEE(key)
-		// expectedSig := uint64(uint16((hash32 >> 24) & 0xFFFF))
-		sigHash := murmur3.SeedSum32(0xD4D4D4D4, key)
-		expectedSig := uint64((sigHash >> 24) & 0xFFFF)
+	added := newDecodedSet()
+	withdrawn := newDecodedSet()
 
-		if cell.SigField != expectedSig {
+	for len(queue) > 0 {
+		i := queue[0]
+		queue = queue[1:]
+		queued[i] = false
+
+		_, m, reason := b.pureKey(i)
+		switch reason {
+		case pureSigMismatch:
+			sigMismatchCount++
+			continue
+		case pureT1:
+			t1CaseCount++
 			continue
+		case pureNotCandidate:
+			continue
+		}
+
+		// 처음 보는 key: slot은 곧 XOR로 바뀌므로 복사해서 파싱
+		adventry := m.entry
+		if adventry == nil {
+			m.key = bytes.Clone(m.key)
+			var err error
+			adventry, err = ParseAdvEntry(enc.NewWireView(enc.Wire{m.key}), false)
+			if err != nil {
+				return nil, nil, fmt.Errorf(" fail Parse : %w \n ", err)
+			}
+		}
+		key, sig, indexes := m.key, m.sig, cellIndexes(m.hashes, n)
+
+		// T2 case: 반대 리스트에 이미 있으면 서로 상쇄
+		sign := b.counts[i]
+		k := string(key)
+		if sign == 1 {
+			if withdrawn.remove(k) {
+				t2CaseCount++
+			} else {
+				added.add(k, adventry)
+			}
+		} else {
+			if added.remove(k) {
+				t2CaseCount++
+			} else {
+				withdrawn.add(k, adventry)
+			}
 		}
 
-		// indexes := extractIBFIndexes(hash32)
-		indexes := extractIBFIndexesFromKey(key)
-		h1, h2, h3 := indexes[0], indexes[1], indexes[2]
+		// XOR로 주변 셀에서 제거하고, 바뀐 셀만 다시 후보로
+		b.Insert(key, sig, indexes, -sign)
+		for _, h := range indexes {
+			if c := b.counts[h]; (c == 1 || c == -1) && !queued[h] {
+				queue = append(queue, h)
+				queued[h] = true
+			}
+		}
+	}
 
-		if i == h1 || i == h2 || i == h3 {
-			pureList[i] = true
+	// 디코딩 끝났는데 남은 셀 존재 → 실패
+	leftover := false
+	for i, c := range b.counts {
+		if c != 0 {
+			leftover = true
+			fmt.Printf("[Leftover Cell %02d] Count: %d, Sig: 0x%x, Key: %x\n", i, c, b.sigs[i], trimPadding(b.slot(i)))
 		}
 	}
+	if sigMismatchCount+t1CaseCount+t2CaseCount > 0 {
+		fmt.Printf("[dIBF decode] sigMismatch=%d t1=%d t2=%d\n", sigMismatchCount, t1CaseCount, t2CaseCount)
+	}
+	if leftover {
+		return added.entries(), withdrawn.entries(), errors.New("cannot fully decode IBF, leftover entries exist")
+	}
 
-	return pureList
+	return added.entries(), withdrawn.entries(), nil
 }
 
-func removeEntry(list []*AdvEntry, target *AdvEntry) []*AdvEntry {
-	for i, entry := range list {
-		if entryEquals(entry, target) {
-			return append(list[:i], list[i+1:]...)
-		}
+func trimPadding(key []byte) []byte {
+	idx := 0
+	for idx < len(key) && key[idx] == 0 {
+		idx++
 	}
-	return list
+	return key[idx:]
 }
 
 func extractIBFIndexes(hash32 uint32) [3]int {
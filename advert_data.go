@@ -1,29 +1,218 @@
 package dv
 
 import (
+	"bufio"
+	"encoding/json"
 	"fmt"
 	"net"
 	"net/url"
 	"os"
+	"sync"
+	"sync/atomic"
 	"time"
 
+	"github.com/named-data/ndnd/dv/config"
 	"github.com/named-data/ndnd/dv/tlv"
 	enc "github.com/named-data/ndnd/std/encoding"
 	"github.com/named-data/ndnd/std/log"
 	"github.com/named-data/ndnd/std/ndn"
 )
 
-func writeToAdvertLog(msg string) {
-	file, err := os.OpenFile("advert_log.txt", os.O_APPEND|os.O_CREATE|os.O_WRONLY, 0644)
+// ibfView is a per-neighbor IBF kept across adverts (see tlv.IBFView).
+type ibfView struct {
+	sync.Mutex
+	*tlv.IBFView
+}
+
+type ibfViewSet struct {
+	mutex sync.Mutex
+	views map[string]*ibfView
+}
+
+func (s *ibfViewSet) get(name string) *ibfView {
+	s.mutex.Lock()
+	defer s.mutex.Unlock()
+	v, ok := s.views[name]
+	if !ok {
+		v = &ibfView{IBFView: tlv.NewIBFView()}
+		s.views[name] = v
+	}
+	return v
+}
+
+// retain drops the views of every neighbor not in names.
+func (s *ibfViewSet) retain(names map[string]bool) {
+	s.mutex.Lock()
+	defer s.mutex.Unlock()
+	for name, v := range s.views {
+		if !names[name] {
+			v.Lock()
+			v.Close()
+			v.Unlock()
+			delete(s.views, name)
+		}
+	}
+}
+
+// pruneIBFViews drops the per-neighbor IBFs of neighbors no longer in the
+// config. Callers hold a.dv.mutex.
+func (a *advertModule) pruneIBFViews() {
+	names := make(map[string]bool, len(a.dv.config.Neighbors))
+	for _, nbr := range a.dv.config.Neighbors {
+		names[nbr.Name] = true
+	}
+	toNeiIBF.retain(names)
+	localIBF.retain(names)
+}
+
+// advertModule는 ndnd 쪽에 정의되어 있어서 이웃별 IBF는 여기에 둔다
+var (
+	toNeiIBF = &ibfViewSet{views: make(map[string]*ibfView)} // generateToNei: AdvertToNei(nbr)
+	localIBF = &ibfViewSet{views: make(map[string]*ibfView)} // handlePushedAdvert: AdvertLocal(sender)
+)
+
+// 수신한 IBF가 처리된 경로별 횟수 (advert_log.jsonl의 ibf_decode 레코드에도 남김)
+var ibfDecodeStats struct {
+	ok              atomic.Uint64 // dIBF 디코딩 성공
+	estimateFetch   atomic.Uint64 // 차이 추정이 너무 커서 바로 전체 광고 fetch
+	decodeFailFetch atomic.Uint64 // 디코딩 실패 후 전체 광고 fetch
+}
+
+func logDecodePath(sender string, path string, cells int, adds int, withdraws int) {
+	writeAdvertRecord(advertRecord{
+		Kind:      "ibf_decode",
+		Nbr:       sender,
+		Path:      path,
+		Cells:     cells,
+		Adds:      adds,
+		Withdraws: withdraws,
+		Totals: map[string]uint64{
+			"ok":                ibfDecodeStats.ok.Load(),
+			"estimate_fetch":    ibfDecodeStats.estimateFetch.Load(),
+			"decode_fail_fetch": ibfDecodeStats.decodeFailFetch.Load(),
+		},
+	})
+	flushAdvertLog()
+}
+
+// nbrEndpoints caches the resolved UDP address of every configured neighbor,
+// index-aligned with config.Neighbors. It is rebuilt only when a neighbor's
+// URI changes, so the push path does no URL parsing or address resolution.
+// A neighbor that failed to resolve stays nil and is retried on every call
+// until it resolves. Callers hold a.dv.mutex.
+var nbrEndpoints struct {
+	uris  []string
+	addrs []*net.UDPAddr
+}
+
+func (a *advertModule) neighborAddrs() []*net.UDPAddr {
+	nbrs := a.dv.config.Neighbors
+	stale := len(nbrEndpoints.uris) != len(nbrs)
+	for i := 0; !stale && i < len(nbrs); i++ {
+		stale = nbrEndpoints.uris[i] != nbrs[i].Uri
+	}
+	if stale {
+		nbrEndpoints.uris = make([]string, len(nbrs))
+		nbrEndpoints.addrs = make([]*net.UDPAddr, len(nbrs))
+		for i, nbr := range nbrs {
+			nbrEndpoints.uris[i] = nbr.Uri
+		}
+	}
+
+	// 실패한 주소는 캐시하지 않고 다음 호출에서 다시 resolve
+	for i, addr := range nbrEndpoints.addrs {
+		if addr == nil {
+			nbrEndpoints.addrs[i] = a.resolveNeighbor(nbrEndpoints.uris[i], stale)
+		}
+	}
+	return nbrEndpoints.addrs
+}
+
+// resolveNeighbor resolves a neighbor URI to its UDP address, or nil. Only
+// the first attempt after a config change warns; retries log at debug.
+func (a *advertModule) resolveNeighbor(uri string, warn bool) *net.UDPAddr {
+	logf := log.Debug
+	if warn {
+		logf = log.Warn
+	}
+	u, err := url.Parse(uri)
 	if err != nil {
-		fmt.Println("로그 파일 열기 실패:", err)
-		return
+		logf(a, "invalid neighbor URI, skip", "uri", uri, "err", err)
+		return nil
+	}
+	udpAddr, err := net.ResolveUDPAddr("udp4", u.Host)
+	if err != nil {
+		logf(a, "invalid neighbor addr, skip", "host", u.Host, "err", err)
+		return nil
+	}
+	return udpAddr
+}
+
+// sendBuf is reused for every pushed payload (guarded by a.dv.mutex);
+// WriteToUDP copies it into the socket before returning.
+var sendBuf []byte
+
+func joinInto(buf []byte, w enc.Wire) []byte {
+	buf = buf[:0]
+	for _, seg := range w {
+		buf = append(buf, seg...)
 	}
-	defer file.Close()
+	return buf
+}
+
+// advert_log.jsonl은 파일을 열어 둔 채 버퍼에 모았다가 push / 수신 이벤트가
+// 끝날 때마다 flushAdvertLog로 쓴다. DV는 SIGKILL로 종료되므로 이벤트가 끝난
+// 뒤에는 버퍼에 남는 레코드가 없어야 하고, 수렴 감지도 타이머만큼 늦어지지 않는다
+const advertLogFile = "advert_log.jsonl"
+
+// advertRecord is one line of advert_log.jsonl.
+type advertRecord struct {
+	Time      float64           `json:"t"`
+	Kind      string            `json:"kind"` // advert_size | ibf_decode
+	Nbr       string            `json:"nbr"`
+	Seq       uint64            `json:"seq,omitempty"`
+	Bytes     int               `json:"bytes,omitempty"`
+	Cells     int               `json:"cells,omitempty"`
+	Path      string            `json:"path,omitempty"`
+	Adds      int               `json:"adds,omitempty"`
+	Withdraws int               `json:"withdraws,omitempty"`
+	Totals    map[string]uint64 `json:"totals,omitempty"`
+}
 
-	_, err = file.WriteString(msg + "\n")
+var advertLog struct {
+	sync.Mutex
+	w *bufio.Writer
+}
+
+func writeAdvertRecord(rec advertRecord) {
+	rec.Time = float64(time.Now().UnixMicro()) / 1e6
+	line, err := json.Marshal(rec)
 	if err != nil {
-		fmt.Println("로그 파일 쓰기 실패:", err)
+		log.Warn(nil, "advert log record", "err", err)
+		return
+	}
+
+	advertLog.Lock()
+	defer advertLog.Unlock()
+	if advertLog.w == nil {
+		file, err := os.OpenFile(advertLogFile, os.O_APPEND|os.O_CREATE|os.O_WRONLY, 0644)
+		if err != nil {
+			fmt.Println("로그 파일 열기 실패:", err)
+			return
+		}
+		advertLog.w = bufio.NewWriterSize(file, 64*1024)
+	}
+	advertLog.w.Write(line)
+	advertLog.w.WriteByte('\n')
+}
+
+func flushAdvertLog() {
+	advertLog.Lock()
+	defer advertLog.Unlock()
+	if advertLog.w != nil {
+		if err := advertLog.w.Flush(); err != nil {
+			fmt.Println("로그 파일 쓰기 실패:", err)
+		}
 	}
 }
 
@@ -61,29 +250,32 @@ func (a *advertModule) generate() {
 	// }
 
 	// 인코딩
-	ibf := advertisement.IBFprogram()
-	payload := ibf.Encode().Join()
+	buf := tlv.GetIBFBuffer(tlv.IBF_CellCount)
+	advertisement.IBFinsert(buf, 1)
+	sendBuf = joinInto(sendBuf, buf.IBF().Encode())
+	tlv.PutIBFBuffer(buf)
+	payload := sendBuf
 	size := len(payload)
 	fmt.Printf("[Initial UDP Advert][Seq=%d] PayloadSize=%d bytes, Neighbors=%d\n",
 		a.seq, size, len(a.dv.config.Neighbors))
 
-	// 모든 이웃에게 UDP 전송
-	for _, nbr := range a.dv.config.Neighbors {
+	// 모든 이웃에게 UDP 전송 (주소는 미리 resolve 해 둔 것 사용)
+	addrs := a.neighborAddrs()
+	neighbors := a.dv.config.Neighbors
+	if size > tlv.IBF_MaxDatagram {
+		// UDP datagram 하나를 넘으면 push 없이 아래 sync interest로만 알린다
+		log.Warn(a, "initial IBF advert exceeds one UDP datagram, not pushed", "bytes", size)
+		neighbors = nil
+	}
+	for i, nbr := range neighbors {
 		// 소켓 선택
 		conn, ok := a.dv.conns[nbr.From]
 		if !ok {
 			log.Warn(a, "no UDP socket for", "from", nbr.From)
 			continue
 		}
-		// 대상 주소 파싱
-		u, err := url.Parse(nbr.Uri)
-		if err != nil {
-			log.Warn(a, "invalid neighbor URI", "uri", nbr.Uri, "err", err)
-			continue
-		}
-		udpAddr, err := net.ResolveUDPAddr("udp4", u.Host)
-		if err != nil {
-			log.Warn(a, "invalid neighbor address", "host", u.Host, "err", err)
+		udpAddr := addrs[i]
+		if udpAddr == nil {
 			continue
 		}
 		// 전송
@@ -106,28 +298,52 @@ func (a *advertModule) generateToNei() { // push 방식으로 nei 마다
 	a.dv.mutex.Lock()
 	defer a.dv.mutex.Unlock()
 
+	// 이웃별 advert_size 레코드를 모아서 push가 끝나면 한 번에 쓴다
+	defer flushAdvertLog()
+
 	// Increment sequence number
 	a.seq++
 
-	for _, nbr := range a.dv.config.Neighbors {
+	addrs := a.neighborAddrs()
+	a.pruneIBFViews()
+	for i, nbr := range a.dv.config.Neighbors {
 		fmt.Printf("generate to nei // ns : %s \n", nbr.Name)
 
 		advertisement := a.dv.rib.AdvertToNei(nbr.Name)
 
-		//IBF program
-		ibf := advertisement.IBFprogram()
-		ibf_content := ibf.Encode()
+		// 이웃별 IBF를 바뀐 entry만 반영해서 갱신
+		// 셀 수(level)는 지난 push 이후 바뀐 entry 수로 고른다. 수신 측이
+		// 지난 push를 반영했다고 가정한 추정치라서, push가 유실되거나
+		// 디코딩에 실패해 차이가 쌓이면 작게 잡힐 수 있다 (그때는 수신 측의
+		// EstimateDiff / 디코딩 실패가 전체 광고 fetch로 넘어간다)
+		view := toNeiIBF.get(nbr.Name)
+		view.Lock()
+		added, removed := view.Sync(advertisement)
+		cells := tlv.IBFCellsFor(added + removed)
+		view.Resize(cells)
+		sendBuf = joinInto(sendBuf, view.Buf.IBF().Encode())
+		// 긴 key가 많으면 큰 level은 UDP datagram 하나를 넘으므로 들어갈 때까지 줄인다
+		for len(sendBuf) > tlv.IBF_MaxDatagram && tlv.IBFLevelBelow(cells) > 0 {
+			cells = tlv.IBFLevelBelow(cells)
+			view.Resize(cells)
+			sendBuf = joinInto(sendBuf, view.Buf.IBF().Encode())
+		}
+		view.Unlock()
+		payload := sendBuf
 
-		content_size := len(ibf_content.Join())
+		content_size := len(payload)
 		// fmt.Printf("		[Advert Size]  %d bytes\n", content_size)
 		// for i, cell := range ibf.Cells {
 		// 	fmt.Printf("			[%d] Cell: %d → key: %d bytes, sig: %d, count: %d\n",
 		// 		i, len(cell.Encode().Join()),
 		// 		len(cell.KeyField), 1+enc.Nat(cell.SigField).EncodingLength(), 1+enc.Nat(cell.Count).EncodingLength())
 		// }
-		logMsg := fmt.Sprintf("[Advert Size][%s] %d bytes", nbr.Name, content_size)
-		fmt.Println(logMsg)      // 콘솔에도 출력
-		writeToAdvertLog(logMsg) // 파일에도 저장
+		writeAdvertRecord(advertRecord{Kind: "advert_size", Nbr: nbr.Name, Seq: a.seq, Bytes: content_size, Cells: cells})
+		if content_size > tlv.IBF_MaxDatagram {
+			// 가장 작은 level도 안 들어간다: 이웃은 sync interest로 전체 광고를 받는다
+			log.Warn(a, "IBF advert exceeds one UDP datagram, not pushed", "to", nbr.Name, "bytes", content_size)
+			continue
+		}
 
 		// 보낼 소켓 선택
 		conn, ok := a.dv.conns[nbr.From]
@@ -136,20 +352,14 @@ func (a *advertModule) generateToNei() { // push 방식으로 nei 마다
 			continue
 		}
 
-		// 송신 대상 주소 파싱
-		u2, err := url.Parse(nbr.Uri)
-		if err != nil {
-			log.Warn(a, "invalid neighbor URI, skip", "uri", nbr.Uri, "err", err)
-			continue
-		}
-		udpAddr, err := net.ResolveUDPAddr("udp4", u2.Host)
-		if err != nil {
-			log.Warn(a, "invalid neighbor addr, skip", "host", u2.Host, "err", err)
+		// 송신 대상 주소 (config가 바뀔 때나 resolve 실패 시에만 다시 resolve)
+		udpAddr := addrs[i]
+		if udpAddr == nil {
 			continue
 		}
 
 		// UDP 전송
-		if _, err := conn.WriteToUDP(ibf_content.Join(), udpAddr); err != nil {
+		if _, err := conn.WriteToUDP(payload, udpAddr); err != nil {
 			log.Warn(a, "UDP push failed", "to", nbr.Name, "addr", udpAddr, "err", err)
 		} else {
 			fmt.Printf("Pushed advert to %s via %s\n", nbr.Name, nbr.From)
@@ -216,6 +426,32 @@ func (a *advertModule) dataHandler(nName enc.Name, seqNo uint64, data enc.Wire)
 	go a.dv.updateRib(ns)
 }
 
+// fetchFullAdvert falls back to fetching the neighbor's whole advertisement
+// (the sync-interest path) when a pushed IBF cannot be decoded.
+func (a *advertModule) fetchFullAdvert(senderName string) {
+	nName, err := enc.NameFromStr(senderName)
+	if err != nil {
+		log.Warn(a, "invalid neighbor name, cannot fetch advertisement", "name", senderName, "err", err)
+		return
+	}
+
+	go func() {
+		a.dv.mutex.Lock()
+		ns := a.dv.neighbors.Get(nName)
+		var bootTime, seqNo uint64
+		if ns != nil {
+			bootTime, seqNo = ns.AdvertBoot, ns.AdvertSeq
+		}
+		a.dv.mutex.Unlock()
+
+		if ns == nil || seqNo == 0 {
+			log.Warn(a, "No advertisement known for neighbor yet, waiting for sync", "name", nName)
+			return
+		}
+		a.dataFetch(nName, bootTime, seqNo)
+	}()
+}
+
 // 수신한 IBF 처리
 func (a *advertModule) handlePushedAdvert(senderIBF *tlv.IBF, from *net.UDPAddr) {
 	// fmt.Printf("handlePushedAdvert!!! 광고 수신 가능!!!\n")
@@ -224,18 +460,51 @@ func (a *advertModule) handlePushedAdvert(senderIBF *tlv.IBF, from *net.UDPAddr)
 	senderName = a.dv.neighborByAddr[from.String()]
 	fmt.Printf("Received UDP advertisement from %s (%s)\n", senderName, from.String())
 
-	// 로컬 IBF 생성 (nexthop이 sender인 경우로만)
-	localAdv := a.dv.rib.AdvertLocal(senderName)
-	localIBF := localAdv.IBFprogram()
+	cells := len(senderIBF.Cells)
+	if !tlv.IBFLevelValid(cells) {
+		log.Error(a, "Unexpected IBF size", "from", senderName, "cells", cells)
+		return
+	}
+
+	// dIBF = sender IBF - 로컬 IBF (nexthop이 sender인 경우로만)
+	// 로컬 IBF는 sender별로 유지하면서 바뀐 entry만 반영한다
+	dIBF := tlv.GetIBFBuffer(cells)
+	defer tlv.PutIBFBuffer(dIBF)
+	dIBF.Load(senderIBF)
+
+	view := localIBF.get(senderName)
+	view.Lock()
+	view.Sync(a.dv.rib.AdvertLocal(senderName))
+	view.Resize(cells)
+	err := dIBF.SubtractBuffer(view.Buf)
+	view.Unlock()
+	if err != nil {
+		log.Error(a, "Failed to build dIBF", "err", err)
+		return
+	}
 
-	// dIBF 생성
-	dIBF := tlv.DIBFgenerate(senderIBF, localIBF)
+	// 차이가 이 IBF로 풀 수 있는 크기를 넘으면 디코딩 대신 전체 광고를 받는다
+	if est := dIBF.EstimateDiff(); !tlv.IBFDecodable(cells, est) {
+		log.Info(a, "dIBF difference too large, fetching full advertisement",
+			"from", senderName, "cells", cells, "estimate", est)
+		ibfDecodeStats.estimateFetch.Add(1)
+		logDecodePath(senderName, "estimate_fetch", cells, 0, 0)
+		a.fetchFullAdvert(senderName)
+		return
+	}
 
 	//dIBF decoding
-	addEntry, withdrawEntry, err := dIBF.DIBFdecode()
+	addEntry, withdrawEntry, err := dIBF.Decode()
 	if err != nil {
-		log.Error(a, "Failed to decode dIBF", "err", err)
+		// 일부만 디코딩된 결과는 쓰지 않고 전체 광고를 바로 받는다
+		log.Warn(a, "Failed to decode dIBF, fetching full advertisement", "from", senderName, "err", err)
+		ibfDecodeStats.decodeFailFetch.Add(1)
+		logDecodePath(senderName, "decode_fail_fetch", cells, len(addEntry), len(withdrawEntry))
+		a.fetchFullAdvert(senderName)
+		return
 	}
+	ibfDecodeStats.ok.Add(1)
+	logDecodePath(senderName, "ok", cells, len(addEntry), len(withdrawEntry))
 
 	// Build Advertisement from decoded entries
 	addAdvert := &tlv.Advertisement{
@@ -264,6 +533,20 @@ func (a *advertModule) handlePushedAdvert(senderIBF *tlv.IBF, from *net.UDPAddr)
 	// Trigger our own advertisement if needed
 	var dirty bool = false
 
+	// withdraw 수행: 같은 (dest, nexthop)이 add에도 있으면 cost 변경이므로 add가 처리
+	replaced := make(map[string]bool, len(addAdvert.Entries))
+	for _, entry := range addAdvert.Entries {
+		replaced[entry.Destination.Name.String()+" "+entry.NextHop.Name.String()] = true
+	}
+	for _, entry := range withdrawAdvert.Entries {
+		if replaced[entry.Destination.Name.String()+" "+entry.NextHop.Name.String()] {
+			continue
+		}
+		// 무한 cost로 바꾸면 아래 Prune에서 바로 경로가 빠진다
+		a.dv.rib.Set(entry.Destination.Name, entry.NextHop.Name, config.CostInfinity)
+		dirty = true
+	}
+
 	// add 수행
 	for _, entry := range addAdvert.Entries {
 
@@ -0,0 +1,63 @@
+import re
+import time
+
+from mininet.log import info
+from mininet.node import Node
+
+# 기본 announce 속도: 초당 ANNOUNCE_RATE 개, 한 번에 최대 ANNOUNCE_BURST 개
+ANNOUNCE_RATE = 20.0
+ANNOUNCE_BURST = 10
+
+class RateLimiter:
+    """Token bucket allowing `rate` operations per second in bursts of up to `burst`."""
+
+    def __init__(self, rate=ANNOUNCE_RATE, burst=ANNOUNCE_BURST):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.tokens = float(self.burst)
+        self.last = time.monotonic()
+
+    def acquire(self, n=1) -> None:
+        n = min(n, self.burst)
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            if self.tokens >= n:
+                self.tokens -= n
+                return
+            time.sleep((n - self.tokens) / self.rate)
+
+def put_cmd(full_prefix: str, payload: str) -> str:
+    return f'ndnd put --expose "{full_prefix}" < {payload} &'
+
+def announce(node: Node, prefixes: list[str], payload: str, limiter: RateLimiter = None) -> None:
+    """
+    Expose `prefixes` (full names) from `node`.
+
+    `ndnd put` serves a single name, so there is still one producer per
+    prefix, but producers are launched in batches of up to `limiter.burst`
+    per shell round trip and paced by the limiter instead of fixed sleeps.
+    """
+    limiter = limiter or RateLimiter()
+    for i in range(0, len(prefixes), limiter.burst):
+        batch = prefixes[i:i + limiter.burst]
+        limiter.acquire(len(batch))
+        info(f'{node.name} put --expose x{len(batch)}: {batch[0]} .. {batch[-1]}\n')
+        node.cmd(' '.join(put_cmd(prefix, payload) for prefix in batch))
+
+def kill_cmd(full_prefix: str) -> str:
+    return f'pkill -f -x "ndnd put --expose {re.escape(full_prefix)}"'
+
+def withdraw(node: Node, prefixes: list[str], limiter: RateLimiter = None) -> None:
+    """
+    Stop the `ndnd put` producers of `prefixes` on `node`. The producer's
+    face closes with it, so the forwarder drops the registration and DV
+    withdraws the prefix. Paced like announce().
+    """
+    limiter = limiter or RateLimiter()
+    for i in range(0, len(prefixes), limiter.burst):
+        batch = prefixes[i:i + limiter.burst]
+        limiter.acquire(len(batch))
+        info(f'{node.name} withdraw x{len(batch)}: {batch[0]} .. {batch[-1]}\n')
+        node.cmd('; '.join(kill_cmd(prefix) for prefix in batch))
@@ -0,0 +1,92 @@
+import os
+import re
+import time
+
+from mininet.node import Node
+
+# minindn Application 은 logfile 을 {homeDir}/log/ 아래에 쓴다
+DV_LOG = os.path.join('log', 'dv.log')
+
+# 변화 감지에 쓰는 노드별 로그 파일 (homeDir 기준)
+WATCH_LOGS = (DV_LOG, 'advert_log.jsonl')
+
+# 로그를 확인하는 주기 (초)
+TICK = 0.02
+
+# 로그 변화가 없을 때의 fallback poll: BACKOFF_MIN 부터 BACKOFF_FACTOR 배씩 BACKOFF_MAX 까지
+BACKOFF_MIN = 0.25
+BACKOFF_MAX = 2.0
+BACKOFF_FACTOR = 2.0
+
+def node_home(node: Node) -> str:
+    return node.params.get('params', {}).get('homeDir', f'/tmp/minindn/{node.name}')
+
+class LogTail:
+    """Follows one log file and returns only the bytes appended since the last read."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = os.path.getsize(path) if os.path.exists(path) else 0
+
+    def read_new(self) -> bytes:
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return b''
+        if size < self.offset:
+            # truncated or recreated
+            self.offset = 0
+        if size == self.offset:
+            return b''
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(size - self.offset)
+        self.offset += len(data)
+        return data
+
+class ConvergenceMonitor:
+    """
+    Waits for route changes on a set of nodes by tailing their DV logs.
+    A node is reported as changed when one of its logs gets a new line
+    (matching `pattern`, if given). When nothing changes the monitor still
+    wakes up on an adaptive backoff so a missed event cannot stall a run.
+    """
+
+    def __init__(self, nodes: list[Node], logs=WATCH_LOGS, pattern: str = None,
+                 tick=TICK, backoff_min=BACKOFF_MIN, backoff_max=BACKOFF_MAX,
+                 backoff_factor=BACKOFF_FACTOR):
+        self.tails = {node.name: [LogTail(os.path.join(node_home(node), log)) for log in logs]
+                      for node in nodes}
+        self.pattern = re.compile(pattern.encode()) if pattern else None
+        self.tick = tick
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+        self.backoff_factor = backoff_factor
+        self.backoff = backoff_min
+
+    def changed(self) -> set[str]:
+        names = set()
+        for name, tails in self.tails.items():
+            for tail in tails:
+                data = tail.read_new()
+                if data and (self.pattern is None or self.pattern.search(data)):
+                    names.add(name)
+        return names
+
+    def wait(self, until: float) -> set[str]:
+        """
+        Block until some node logs a change, the backoff interval expires,
+        or `until` (a time.time() value) is reached. Returns the changed
+        node names; an empty set means the fallback poll fired.
+        """
+        wake = min(time.time() + self.backoff, until)
+        while True:
+            names = self.changed()
+            if names:
+                self.backoff = self.backoff_min
+                return names
+            now = time.time()
+            if now >= wake:
+                self.backoff = min(self.backoff * self.backoff_factor, self.backoff_max)
+                return set()
+            time.sleep(min(self.tick, wake - now))
@@ -0,0 +1,301 @@
+"""
+Offline IBF sizing benchmark.
+
+Sweeps difference-set size x cell count x hash count over AdvEntry keys
+built from the experiment's prefix corpora (prefix_*.txt, ndn_prefixes.csv)
+and reports, per point: decode success rate, peel iterations, bytes on the
+wire for a full advert IBF, time per decode, the receiver's difference
+estimate and how often it would fall back to fetching the full advert.
+Results go to a CSV and, if matplotlib is installed, a plot.
+
+    python ibf_bench.py --diff 1,5,10,20,30,40 --cells 30,50,80 --hashes 3,4 --trials 500
+
+--alloc instead compares the cell layouts of IBF.go (ibf_ref.LegacyCells vs
+ibf_ref.CellBuffer): Go heap allocations and bytes per programmed advert,
+Python-side peak memory (tracemalloc) and keys/s. keys/s compares the two
+mirrors with each other; NumPy per-call overhead dominates it, not the XOR.
+
+    python ibf_bench.py --alloc --advert-entries 300 --trials 200
+
+--incremental compares rebuilding the advert IBF from scratch with keeping
+it in step (ibf_ref.IncrementalIBF, IBFView in IBF.go) for an advert of
+--advert-entries entries where --diff entries change between adverts.
+
+    python ibf_bench.py --incremental --advert-entries 2000 --diff 1,10,100 --trials 20
+
+--selftest only checks ibf_ref against its known answers (ibf_ref.self_check)
+and exits non-zero on a mismatch.
+
+    python ibf_bench.py --selftest
+"""
+
+import argparse
+import csv
+import glob
+import os
+import time
+import tracemalloc
+
+import numpy as np
+
+import ibf_ref
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+NETWORK_PREFIX = '/minindn'
+ROUTER_NAMES = ['a', 'b', 'c', 'd', 'e', 'f', 'g']
+
+def load_corpus(dirs: list[str] = None) -> list[str]:
+    """Destination names (without network) from every prefix_*.txt and ndn_prefixes.csv found."""
+    dirs = dirs or [BASE_DIR, os.path.join(BASE_DIR, '0709')]
+    names = {}
+    for d in dirs:
+        for path in sorted(glob.glob(os.path.join(d, 'prefix_*.txt'))):
+            router = os.path.basename(path)[len('prefix_'):-len('.txt')]
+            if router == 'new':
+                router = 'a'
+            with open(path, 'r') as f:
+                for line in f:
+                    if line.strip():
+                        names.setdefault(f'/{router}/{line.strip().lstrip("/")}')
+
+        csv_path = os.path.join(d, 'ndn_prefixes.csv')
+        if os.path.exists(csv_path):
+            with open(csv_path, 'r') as f:
+                rows = [row['prefix'].strip().lstrip('/') for row in csv.DictReader(f) if row.get('prefix')]
+            for i, prefix in enumerate(rows):
+                names.setdefault(f'/{ROUTER_NAMES[i % len(ROUTER_NAMES)]}/{prefix}')
+    return list(names)
+
+def build_keys(corpus: list[str], network=NETWORK_PREFIX, max_cost=3) -> list[bytes]:
+    """AdvEntry keys for every destination x next hop x cost, so the key space exceeds the corpus."""
+    return [ibf_ref.encode_adv_entry(f'{network}{dest}', f'{network}/{nh}', cost)
+            for dest in corpus for nh in ROUTER_NAMES for cost in range(1, max_cost + 1)]
+
+def run_point(batch: ibf_ref.KeyBatch, lookup: dict, diff: int, trials: int,
+              withdraw_frac: float, rng: np.random.Generator, decoder='peel') -> dict:
+    decoded = correct = 0
+    peels = scans = 0
+    estimate = fallback = 0.0
+    elapsed = 0.0
+    n_withdraw = int(round(diff * withdraw_frac))
+    for _ in range(trials):
+        rows = rng.choice(len(batch), size=diff, replace=False)
+        adds, withdraws = rows[:diff - n_withdraw], rows[diff - n_withdraw:]
+
+        # IBF is linear: sender - local only keeps the symmetric difference
+        dibf = ibf_ref.IBF.program(batch.take(adds))
+        dibf.insert(batch.take(withdraws), sign=-1)
+
+        est = dibf.estimate_diff()
+        fallback += not ibf_ref.decodable(dibf.n, est)
+        estimate += min(est, len(batch))
+
+        start = time.perf_counter()
+        res = getattr(dibf, decoder)(lookup)
+        elapsed += time.perf_counter() - start
+
+        decoded += res.ok
+        correct += res.ok and set(res.added) == {batch.keys[i] for i in adds} \
+            and set(res.withdrawn) == {batch.keys[i] for i in withdraws}
+        peels += res.peels
+        scans += res.scans
+    return {
+        'decode_rate': decoded / trials,
+        'correct_rate': correct / trials,
+        'mean_peels': peels / trials,
+        'mean_scans': scans / trials,
+        'mean_estimate': estimate / trials,
+        'fetch_rate': fallback / trials,
+        'us_per_decode': elapsed / trials * 1e6,
+    }
+
+def advert_wire_size(batch: ibf_ref.KeyBatch, entries: int, rng: np.random.Generator) -> int:
+    """Encoded size of a full advert IBF carrying `entries` keys."""
+    rows = rng.choice(len(batch), size=min(entries, len(batch)), replace=False)
+    return ibf_ref.IBF.program(batch.take(rows)).wire_size()
+
+def sweep(keys: list[bytes], diffs: list[int], cells: list[int], hashes: list[int], trials: int,
+          withdraw_frac=0.0, advert_entries=None, seed=0, decoder='peel') -> list[dict]:
+    rng = np.random.default_rng(seed)
+    advert_entries = advert_entries or len(keys) // (len(ROUTER_NAMES) * 3)
+    results = []
+    for m in cells:
+        for k in hashes:
+            batch = ibf_ref.KeyBatch(keys, cells=m, hashes=k)
+            lookup = batch.lookup()
+            wire = advert_wire_size(batch, advert_entries, rng)
+            for d in diffs:
+                if d > len(keys):
+                    continue
+                row = {'cells': m, 'hashes': k, 'diff': d, 'withdraw_frac': withdraw_frac,
+                       'trials': trials, 'wire_bytes': wire}
+                row.update(run_point(batch, lookup, d, trials, withdraw_frac, rng, decoder))
+                print(f"cells={m:4d} k={k} d={d:4d}  decode={row['decode_rate']:.3f} "
+                      f"correct={row['correct_rate']:.3f} peels={row['mean_peels']:.1f} "
+                      f"est={row['mean_estimate']:.1f} fetch={row['fetch_rate']:.2f} "
+                      f"{row['us_per_decode']:.0f}us wire={wire}B")
+                results.append(row)
+    return results
+
+def alloc_point(store, keys: list[bytes], hashed: list, adverts: int) -> dict:
+    """Program `adverts` adverts of `keys` into `store`, resetting between adverts as generateToNei does."""
+    allocs, alloc_bytes = store.allocs, store.alloc_bytes
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(adverts):
+        store.reset()
+        for key, (idx, sig) in zip(keys, hashed):
+            store.insert(key, sig, idx)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'allocs_per_advert': (store.allocs - allocs) / adverts,
+        'bytes_per_advert': (store.alloc_bytes - alloc_bytes) / adverts,
+        'py_peak_bytes': peak,
+        'keys_per_s': len(keys) * adverts / elapsed,
+    }
+
+def alloc_bench(keys: list[bytes], entries: int, adverts: int, cells=ibf_ref.IBF_CELL_COUNT,
+                seed=0) -> list[dict]:
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(keys), size=min(entries, len(keys)), replace=False)
+    sample = [keys[i] for i in rows]
+    hashed = [(ibf_ref.key_indexes(k, cells), ibf_ref.key_sig(k)) for k in sample]
+
+    results = []
+    for name, store in (('legacy', ibf_ref.LegacyCells(cells)), ('buffer', ibf_ref.CellBuffer(cells))):
+        row = {'layout': name, 'cells': cells, 'entries': len(sample), 'adverts': adverts}
+        row.update(alloc_point(store, sample, hashed, adverts))
+        print(f"{name:6s} entries={len(sample)}  allocs/advert={row['allocs_per_advert']:.0f} "
+              f"bytes/advert={row['bytes_per_advert']:.0f} py_peak={row['py_peak_bytes']}B "
+              f"{row['keys_per_s']:.0f} keys/s")
+        results.append(row)
+    return results
+
+def advert_entries(corpus: list[str], entries: int, network=NETWORK_PREFIX) -> list[str]:
+    """`entries` destination names, repeating the corpus under numbered suffixes if it is too small."""
+    dests = [f'{network}{d}' for d in corpus]
+    return [dests[i % len(dests)] + (f'/{i // len(dests)}' if i >= len(dests) else '')
+            for i in range(entries)]
+
+def incremental_bench(corpus: list[str], entries: int, changes: list[int], rounds: int,
+                      cells=ibf_ref.IBF_CELL_COUNT, seed=0, network=NETWORK_PREFIX) -> list[dict]:
+    rng = np.random.default_rng(seed)
+    dests = advert_entries(corpus, entries, network)
+    results = []
+    for c in changes:
+        rib = {d: (f'{network}/{ROUTER_NAMES[rng.integers(len(ROUTER_NAMES))]}', 1) for d in dests}
+        view = ibf_ref.IncrementalIBF(cells)
+        view.sync((d, nh, cost) for d, (nh, cost) in rib.items())
+        buf = ibf_ref.CellBuffer(cells)
+        t_rebuild = t_sync = 0.0
+        for _ in range(rounds):
+            # a route change shows up as a new next hop or cost for the destination
+            for i in rng.choice(len(dests), size=min(c, len(dests)), replace=False):
+                rib[dests[i]] = (f'{network}/{ROUTER_NAMES[rng.integers(len(ROUTER_NAMES))]}',
+                                 int(rng.integers(1, 16)))
+            advert = [(d, nh, cost) for d, (nh, cost) in rib.items()]
+
+            start = time.perf_counter()
+            ibf_ref.program_entries(advert, cells, buf)
+            t_rebuild += time.perf_counter() - start
+
+            start = time.perf_counter()
+            view.sync(advert)
+            t_sync += time.perf_counter() - start
+
+            if buf.wire_cells() != view.buf.wire_cells():
+                raise AssertionError('incremental IBF diverged from rebuild')
+
+        row = {'entries': entries, 'changes': c, 'rounds': rounds, 'cells': cells,
+               'us_rebuild': t_rebuild / rounds * 1e6, 'us_sync': t_sync / rounds * 1e6}
+        row['speedup'] = row['us_rebuild'] / row['us_sync']
+        print(f"entries={entries} changes={c:5d}  rebuild={row['us_rebuild']:.0f}us "
+              f"sync={row['us_sync']:.0f}us  x{row['speedup']:.1f}")
+        results.append(row)
+    return results
+
+def write_csv(results: list[dict], path: str) -> None:
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(results[0]))
+        writer.writeheader()
+        writer.writerows(results)
+
+def plot(results: list[dict], path: str) -> bool:
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print('matplotlib not installed, skipping plot')
+        return False
+
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 4.5))
+    series = sorted({(r['cells'], r['hashes']) for r in results})
+    for m, k in series:
+        rows = [r for r in results if r['cells'] == m and r['hashes'] == k]
+        label = f'{m} cells, k={k}'
+        ax1.plot([r['diff'] for r in rows], [r['correct_rate'] for r in rows], marker='o', label=label)
+        ax2.plot([r['diff'] for r in rows], [r['mean_peels'] for r in rows], marker='o', label=label)
+    ax1.set_xlabel('difference size')
+    ax1.set_ylabel('decode success')
+    ax2.set_xlabel('difference size')
+    ax2.set_ylabel('peels per decode')
+    ax1.legend()
+    fig.tight_layout()
+    fig.savefig(path)
+    return True
+
+def _ints(s: str) -> list[int]:
+    return [int(x) for x in s.split(',') if x]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='IBF decode-success / cell-count sweep')
+    parser.add_argument('--diff', type=_ints, default=_ints('1,5,10,15,20,25,30,40,50'))
+    parser.add_argument('--cells', type=_ints, default=_ints(str(ibf_ref.IBF_CELL_COUNT)))
+    parser.add_argument('--hashes', type=_ints, default=_ints(str(ibf_ref.DEFAULT_HASHES)))
+    parser.add_argument('--trials', type=int, default=200)
+    parser.add_argument('--withdraw-frac', type=float, default=0.0,
+                        help='fraction of the difference that is withdrawals')
+    parser.add_argument('--advert-entries', type=int, default=None,
+                        help='entries in the advert used for the wire size (default: corpus size)')
+    parser.add_argument('--legacy-decode', action='store_true',
+                        help='use the old rescanning decoder (IBF.peel_rescan)')
+    parser.add_argument('--alloc', action='store_true',
+                        help='compare cell layouts (allocations, keys/s) instead of the decode sweep')
+    parser.add_argument('--incremental', action='store_true',
+                        help='compare IBF rebuild vs incremental sync; --diff is changes per advert')
+    parser.add_argument('--selftest', action='store_true',
+                        help='check ibf_ref hashing / encoding against known answers and exit')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='ibf_bench.csv')
+    parser.add_argument('--plot', default='ibf_bench.png')
+    args = parser.parse_args()
+
+    if args.selftest:
+        failed = ibf_ref.self_check()
+        for line in failed:
+            print(f'[FAIL] {line}')
+        print(f'ibf_ref self check: {"ok" if not failed else f"{len(failed)} mismatches"}')
+        raise SystemExit(1 if failed else 0)
+
+    corpus = load_corpus()
+    keys = build_keys(corpus)
+    print(f'{len(corpus)} destinations, {len(keys)} candidate AdvEntry keys')
+
+    if args.incremental:
+        results = incremental_bench(corpus, args.advert_entries or len(corpus), args.diff,
+                                    args.trials, args.cells[0], args.seed)
+    elif args.alloc:
+        results = alloc_bench(keys, args.advert_entries or len(corpus), args.trials,
+                              args.cells[0], args.seed)
+    else:
+        results = sweep(keys, args.diff, args.cells, args.hashes, args.trials,
+                        args.withdraw_frac, args.advert_entries, args.seed,
+                        'peel_rescan' if args.legacy_decode else 'peel')
+    if results:
+        write_csv(results, args.out)
+        print(f'wrote {args.out}')
+        if args.plot and not (args.alloc or args.incremental) and plot(results, args.plot):
+            print(f'wrote {args.plot}')
@@ -0,0 +1,91 @@
+"""
+Content-addressed on-disk cache of the DV trust root and node keys.
+
+    <KEY_CACHE_DIR>/root-<sha256(network, key type)>/root.key, root.cert
+        <sha256(network, node, key type)>/node.key, node.cert
+
+Node entries live under the root that signed them, so a regenerated root
+drops every node cert with it. Entries are built in a temporary directory
+and renamed into place, which keeps concurrent runs (matrix.py workers)
+from seeing half-written keys. Certificates are regenerated after
+MAX_AGE so a cached cert never outlives its validity period.
+"""
+
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+KEY_CACHE_DIR = os.environ.get('MN_DV_KEY_CACHE', os.path.expanduser('~/.cache/mn-dv-keys'))
+KEY_TYPE = 'ed25519'
+MAX_AGE = 30 * 24 * 3600
+
+# 노드 키를 동시에 만드는 최대 프로세스 수
+KEYGEN_WORKERS = 16
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha256('\0'.join(parts).encode()).hexdigest()[:24]
+
+def _fresh(path: str) -> bool:
+    try:
+        return time.time() - os.stat(path).st_mtime < MAX_AGE
+    except OSError:
+        return False
+
+def _keygen(name: str, key_path: str, cert_path: str, signer_key: str) -> None:
+    with open(key_path, 'wb') as key:
+        subprocess.run(['ndnd', 'sec', 'keygen', name, KEY_TYPE], stdout=key, check=True)
+    with open(key_path, 'rb') as key, open(cert_path, 'wb') as cert:
+        subprocess.run(['ndnd', 'sec', 'sign-cert', signer_key], stdin=key, stdout=cert, check=True)
+
+def _build(path: str, marker: str, build) -> str:
+    """
+    Run build(tmp_dir) and move the result to `path`. If another process
+    published a fresh entry meanwhile, that one is kept and ours dropped.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        build(tmp)
+        if not _fresh(os.path.join(path, marker)):
+            shutil.rmtree(path, ignore_errors=True)
+            os.rename(tmp, path)
+    except OSError:
+        # 다른 프로세스가 먼저 같은 항목을 만들었다
+        if not _fresh(os.path.join(path, marker)):
+            raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return path
+
+def cert_name(cert_path: str) -> str:
+    with open(cert_path) as f:
+        for line in f:
+            if line.startswith('Name:'):
+                return line.split()[1]
+    raise ValueError(f'No certificate name in {cert_path}')
+
+def root(network: str) -> str:
+    """Directory holding root.key / root.cert of `network`."""
+    path = os.path.join(KEY_CACHE_DIR, f'root-{_digest(network, KEY_TYPE)}')
+    if not _fresh(os.path.join(path, 'root.cert')):
+        _build(path, 'root.cert', lambda tmp: _keygen(network, f'{tmp}/root.key', f'{tmp}/root.cert', f'{tmp}/root.key'))
+    return path
+
+def node_keys(root_dir: str, network: str, node_name: str) -> str:
+    """Directory holding node.key / node.cert of `node_name`, signed by the root in `root_dir`."""
+    path = os.path.join(root_dir, _digest(network, node_name, KEY_TYPE))
+    if not _fresh(os.path.join(path, 'node.cert')):
+        _build(path, 'node.cert', lambda tmp: _keygen(f'{network}/{node_name}/32=DV', f'{tmp}/node.key',
+                                                      f'{tmp}/node.cert', f'{root_dir}/root.key'))
+    return path
+
+def provision(root_dir: str, network: str, node_names: list[str]) -> dict[str, str]:
+    """node_keys() for every node, generating missing entries concurrently."""
+    with ThreadPoolExecutor(max_workers=KEYGEN_WORKERS) as pool:
+        dirs = pool.map(lambda name: node_keys(root_dir, network, name), node_names)
+        return dict(zip(node_names, dirs))
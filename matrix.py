@@ -0,0 +1,358 @@
+"""
+Scenario matrix runner.
+
+Runs every combination of a parameter grid, one Minindn instance per run,
+in a fresh worker process:
+
+    sudo python matrix.py --tree 0709 --grid per_node=20,50 --grid cycle=1,2 \\
+        --grid mode=ibf,dv --bin dv=/opt/ndnd-dv/bin -j 2
+
+Grid keys:
+  topo      Minindn topology file (relative to the tree)
+  scenario  module.function, default test_ibf.scenario
+  fw        forwarder: ndnd or nfd
+  mode      'ibf' / 'dv' label; --bin mode=DIR puts that ndnd build first in PATH
+  pin       true: pin each node's processes to its own CPUs (resources.py)
+  <name>    an attribute of the tree's config.py (per_node, cycle, ...) is
+            overridden before the scenario is imported, anything else is
+            passed to the scenario as a keyword argument; keys that are
+            neither are rejected before any run starts
+
+Each run writes its log, metrics, /proc and interface samples (.npz) and
+result.json to <out>/<run id>/ and appends one line to <out>/progress.jsonl
+keyed by the parameter tuple. Rerunning the same command skips runs
+already recorded as ok, so an interrupted matrix resumes where it stopped.
+
+With -j > 1 every worker gets its own network, mount and PID namespace
+(unshare) with private /tmp and /run, so concurrent Mininet instances do
+not see each other's links, sockets or processes, and is confined with
+taskset to its own slice of the host CPUs; the worker's resource plan
+(GOMAXPROCS, fw threads) is sized to that slice.
+"""
+
+import argparse
+import ast
+import hashlib
+import importlib
+import inspect
+import itertools
+import json
+import os
+import queue
+import shlex
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MATRIX_DIR = os.path.join(BASE_DIR, 'matrix_runs')
+PROGRESS_FILE = 'progress.jsonl'
+RESULT_FILE = 'result.json'
+PARAMS_FILE = 'params.json'
+
+DEFAULT_SCENARIO = 'test_ibf.scenario'
+
+# worker 가 직접 쓰는 grid key (scenario 로 넘기지 않음, mode 는 받을 때만 넘김)
+RESERVED_KEYS = {'topo', 'scenario', 'fw', 'mode', 'pin'}
+CORES_PER_RUN = 4
+RUN_TIMEOUT = 30 * 60
+
+def parse_value(value: str):
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+def parse_grid(specs: list[str]) -> dict[str, list]:
+    grid = {}
+    for spec in specs:
+        key, sep, values = spec.partition('=')
+        if not sep or not values:
+            raise ValueError(f'grid entry must be key=v1,v2,...: {spec}')
+        grid[key] = [parse_value(v) for v in values.split(',')]
+    return grid
+
+def expand(grid: dict[str, list]) -> list[dict]:
+    keys = sorted(grid)
+    return [dict(zip(keys, combo)) for combo in itertools.product(*(grid[k] for k in keys))]
+
+def run_key(params: dict) -> str:
+    return json.dumps(params, sort_keys=True)
+
+def run_id(params: dict) -> str:
+    readable = '_'.join(f'{k}-{v}' for k, v in sorted(params.items()))
+    readable = ''.join(c if c.isalnum() or c in '-_.' else '' for c in readable)[:60]
+    return f'{readable}_{hashlib.sha1(run_key(params).encode()).hexdigest()[:8]}'
+
+def load_progress(path: str) -> dict[str, dict]:
+    """Last recorded entry per run key."""
+    done = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                done[entry['key']] = entry
+    return done
+
+def config_names(tree: str) -> set[str]:
+    """Top-level names assigned in the tree's config.py (empty without one)."""
+    path = os.path.join(tree, 'config.py')
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        module = ast.parse(f.read(), path)
+    names = set()
+    for stmt in module.body:
+        targets = stmt.targets if isinstance(stmt, ast.Assign) else \
+            [stmt.target] if isinstance(stmt, (ast.AnnAssign, ast.AugAssign)) else []
+        names.update(t.id for t in targets if isinstance(t, ast.Name))
+    return names
+
+def scenario_params(tree: str, scenario: str) -> tuple[set[str], bool]:
+    """(keyword parameters, accepts **kwargs) of module.function in the tree, read without importing it."""
+    module_name, _, func_name = scenario.rpartition('.')
+    path = os.path.join(tree, *module_name.split('.')) + '.py'
+    if not os.path.exists(path):
+        raise ValueError(f'scenario module not found: {path}')
+    with open(path) as f:
+        module = ast.parse(f.read(), path)
+    func = next((stmt for stmt in module.body
+                 if isinstance(stmt, ast.FunctionDef) and stmt.name == func_name), None)
+    if func is None:
+        raise ValueError(f'{func_name} not found in {path}')
+    args = func.args
+    names = {a.arg for a in args.posonlyargs + args.args + args.kwonlyargs}
+    return names, args.kwarg is not None
+
+def check_params(runs: list[dict], tree: str) -> None:
+    """Reject grid keys that are neither reserved, config.py attributes nor scenario parameters (ValueError)."""
+    config = config_names(tree)
+    errors = set()
+    for params in runs:
+        scenario = params.get('scenario', DEFAULT_SCENARIO)
+        accepted, any_kwarg = scenario_params(tree, scenario)
+        if any_kwarg:
+            continue
+        for key in params.keys() - RESERVED_KEYS - config:
+            if key not in accepted:
+                errors.add(f'{key} (not in {os.path.join(tree, "config.py")} nor a parameter of {scenario})')
+    if errors:
+        raise ValueError('unknown grid keys: ' + ', '.join(sorted(errors)))
+
+def can_isolate() -> bool:
+    return os.geteuid() == 0 and shutil.which('unshare') is not None
+
+def cpu_slots(jobs: int) -> list[list[int]]:
+    """Split the CPUs this process may use into `jobs` slices (shared when jobs > CPUs)."""
+    cpus = sorted(os.sched_getaffinity(0))
+    per = max(1, len(cpus) // jobs)
+    return [cpus[i * per:(i + 1) * per] or cpus for i in range(jobs)]
+
+def worker_cmd(run_dir: str, isolate: bool, cpus: list[int] = None) -> list[str]:
+    cmd = [sys.executable, os.path.abspath(__file__), '--worker', run_dir]
+    if not isolate:
+        return cmd
+    # 워커마다 별도 net/mount/pid namespace, /tmp 와 /run 은 tmpfs 로 분리
+    inner = 'mount -t tmpfs tmpfs /tmp && mount -t tmpfs tmpfs /run && exec ' + shlex.join(cmd)
+    cmd = ['unshare', '--net', '--mount', '--pid', '--fork', '--kill-child', '--mount-proc',
+           'sh', '-c', inner]
+    if cpus:
+        cmd = ['taskset', '-c', ','.join(map(str, cpus))] + cmd
+    return cmd
+
+class Matrix:
+    def __init__(self, runs: list[dict], out_dir=MATRIX_DIR, tree='.', bins: dict[str, str] = None,
+                 jobs=1, timeout=RUN_TIMEOUT):
+        self.runs = runs
+        self.out_dir = os.path.abspath(out_dir)
+        self.tree = os.path.join(BASE_DIR, tree)
+        self.bins = bins or {}
+        self.jobs = jobs
+        self.timeout = timeout
+        self.progress_path = os.path.join(self.out_dir, PROGRESS_FILE)
+        self.lock = threading.Lock()
+        self.slots = queue.Queue()
+        for cpus in cpu_slots(jobs):
+            self.slots.put(cpus)
+
+    def pending(self) -> list[dict]:
+        done = load_progress(self.progress_path)
+        return [p for p in self.runs if done.get(run_key(p), {}).get('status') != 'ok']
+
+    def record(self, entry: dict) -> None:
+        with self.lock:
+            with open(self.progress_path, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+
+    def run_one(self, params: dict) -> dict:
+        run_dir = os.path.join(self.out_dir, run_id(params))
+        os.makedirs(run_dir, exist_ok=True)
+        with open(os.path.join(run_dir, PARAMS_FILE), 'w') as f:
+            json.dump({'params': params, 'tree': self.tree, 'bin': self.bins.get(params.get('mode'))}, f)
+        try:
+            os.remove(os.path.join(run_dir, RESULT_FILE))
+        except FileNotFoundError:
+            pass
+
+        start = time.time()
+        status = 'ok'
+        cpus = self.slots.get()
+        with open(os.path.join(run_dir, 'run.log'), 'w') as log:
+            try:
+                proc = subprocess.run(worker_cmd(run_dir, self.jobs > 1, cpus), stdout=log,
+                                      stderr=subprocess.STDOUT, timeout=self.timeout)
+                if proc.returncode != 0:
+                    status = f'failed ({proc.returncode})'
+            except subprocess.TimeoutExpired:
+                status = 'timeout'
+            finally:
+                self.slots.put(cpus)
+
+        result = None
+        try:
+            with open(os.path.join(run_dir, RESULT_FILE)) as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            if status == 'ok':
+                status = 'failed (no result)'
+
+        entry = {'key': run_key(params), 'params': params, 'status': status,
+                 'elapsed': round(time.time() - start, 3), 'dir': run_dir, 'result': result}
+        self.record(entry)
+        print(f'[{status}] {run_key(params)} in {entry["elapsed"]:.1f}s', flush=True)
+        return entry
+
+    def run(self) -> list[dict]:
+        os.makedirs(self.out_dir, exist_ok=True)
+        pending = self.pending()
+        print(f'{len(self.runs) - len(pending)}/{len(self.runs)} runs already done, '
+              f'{len(pending)} to go with {self.jobs} worker(s)', flush=True)
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            return list(pool.map(self.run_one, pending))
+
+def _apply_config(params: dict) -> dict:
+    """Override the tree's config.py attributes; returns the remaining params."""
+    try:
+        config = importlib.import_module('config')
+    except ImportError:
+        return dict(params)
+    rest = {}
+    for key, value in params.items():
+        if hasattr(config, key):
+            setattr(config, key, value)
+        else:
+            rest[key] = value
+    if hasattr(config, 'per_node_total'):
+        config.per_node_total = config.per_node * config.cycle
+    return rest
+
+def worker(run_dir: str) -> None:
+    """One matrix run: a Minindn instance and one scenario call, in this process."""
+    with open(os.path.join(run_dir, PARAMS_FILE)) as f:
+        spec = json.load(f)
+    params = dict(spec['params'])
+
+    os.chdir(spec['tree'])
+    sys.path.insert(0, spec['tree'])
+    if spec.get('bin'):
+        os.environ['PATH'] = spec['bin'] + os.pathsep + os.environ['PATH']
+
+    from mininet.log import setLogLevel
+    from minindn.minindn import Minindn
+    from minindn.apps.nfd import Nfd
+    setLogLevel('info')
+
+    topo = params.pop('topo', None)
+    module_name, _, func_name = params.pop('scenario', DEFAULT_SCENARIO).rpartition('.')
+    fw_name = params.pop('fw', 'ndnd')
+    pin = params.pop('pin', False)
+    kwargs = _apply_config(params)
+
+    # config 덮어쓴 뒤에 import 해야 prefix_plan / scenario 가 새 값을 본다
+    from fw import NDNd_FW
+    import dv_util
+    scenario = getattr(importlib.import_module(module_name), func_name)
+    accepted = inspect.signature(scenario).parameters
+    if 'mode' in kwargs and 'mode' not in accepted:
+        # mode 는 --bin 선택용 label 일 뿐이므로 받지 않는 scenario 에는 넘기지 않는다
+        kwargs.pop('mode')
+    if 'fw' in accepted:
+        kwargs['fw'] = {'ndnd': NDNd_FW, 'nfd': Nfd}[fw_name]
+    if 'metrics_dir' in accepted:
+        kwargs['metrics_dir'] = run_dir
+
+    # Minindn 은 sys.argv 를 파싱한다
+    sys.argv = [sys.argv[0]]
+    Minindn.cleanUp()
+    Minindn.verifyDependencies()
+    ndn = Minindn(topoFile=topo) if topo else Minindn()
+    ndn.start()
+    import netstats
+    import proc_sampler
+    import resources
+    resources.activate(ndn.net.hosts, pin=pin)
+    sampler = proc_sampler.ProcSampler(ndn.net.hosts, os.path.join(run_dir, 'proc.npz')).start()
+    net_sampler = netstats.NetSampler(ndn.net.hosts, os.path.join(run_dir, 'net.npz')).start()
+    try:
+        start = time.time()
+        result = scenario(ndn, **kwargs)
+        elapsed = time.time() - start
+    finally:
+        sampler.stop()
+        net_sampler.stop()
+        ndn.stop()
+        os.system('pkill -9 ndnd')
+        os.system('pkill -9 nfd')
+
+    with open(os.path.join(run_dir, RESULT_FILE), 'w') as f:
+        # times: scenario 가 돌려준 phase 별 수렴 시간, node_times: 마지막 수렴의 노드별 시간
+        json.dump({'elapsed': round(elapsed, 3), 'times': result, 'node_times': dict(dv_util.LAST_NODE_TIMES),
+                   'resources': resources.to_dict()}, f)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run a scenario parameter grid')
+    parser.add_argument('--grid', action='append', default=[], metavar='KEY=V1,V2',
+                        help='parameter values to sweep (repeatable)')
+    parser.add_argument('--tree', default='.', help="scenario tree relative to this file ('.' or '0709')")
+    parser.add_argument('--bin', action='append', default=[], metavar='MODE=DIR',
+                        help='directory holding the ndnd build for a mode')
+    parser.add_argument('--out', default=MATRIX_DIR, help='results directory (not under /tmp when -j > 1)')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help=f'concurrent runs (default: cores / {CORES_PER_RUN})')
+    parser.add_argument('--timeout', type=float, default=RUN_TIMEOUT, help='seconds per run')
+    parser.add_argument('--dry-run', action='store_true', help='list pending runs and exit')
+    parser.add_argument('--worker', metavar='RUN_DIR', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker)
+        sys.exit(0)
+
+    runs = expand(parse_grid(args.grid))
+    try:
+        check_params(runs, os.path.normpath(os.path.join(BASE_DIR, args.tree)))
+    except ValueError as e:
+        parser.error(str(e))
+    bins = dict(b.split('=', 1) for b in args.bin)
+    jobs = args.jobs or max(1, (os.cpu_count() or 1) // CORES_PER_RUN)
+    if jobs > 1 and not can_isolate():
+        print('[WARN] namespaces need root and unshare; running one at a time')
+        jobs = 1
+
+    matrix = Matrix(runs, out_dir=args.out, tree=args.tree, bins=bins, jobs=jobs, timeout=args.timeout)
+    if args.dry_run:
+        for params in matrix.pending():
+            print(run_id(params), run_key(params))
+        sys.exit(0)
+
+    entries = matrix.run()
+    failed = [e for e in entries if e['status'] != 'ok']
+    print(f'{len(entries) - len(failed)} ok, {len(failed)} failed; progress in {matrix.progress_path}')
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,145 @@
+"""
+Per-link byte and packet accounting from the nodes' interface counters.
+
+Counters come from /proc/<node.pid>/net/dev, which shows the interfaces of
+the node's network namespace without a shell round trip, so they include
+everything the forwarder put on the wire: sync interests, pushed IBF
+adverts, full advert fetches and retransmissions.
+
+NetSampler snapshots every interface in node.intfList() every `interval`
+seconds during the scenario (cumulative counters, written to one .npz by
+stop()) and at each phase boundary. phase_end(label), called by
+Metrics.phase, returns the per-interface deltas since the previous
+boundary and logs the phase total and the busiest link; a link's traffic
+is the tx of both of its ends.
+"""
+
+import os
+import threading
+import time
+
+from array import array
+
+import numpy as np
+
+from mininet.log import info
+from mininet.node import Node
+
+NET_INTERVAL = 0.1
+
+COUNTERS = ('rx_bytes', 'rx_packets', 'tx_bytes', 'tx_packets')
+
+# 현재 실행 중인 sampler (phase_end 용)
+SAMPLER: 'NetSampler' = None
+
+def read_dev(pid: int) -> dict[str, tuple[int, int, int, int]]:
+    """{interface: (rx bytes, rx packets, tx bytes, tx packets)} of pid's network namespace."""
+    counters = {}
+    try:
+        with open(f'/proc/{pid}/net/dev') as f:
+            lines = f.readlines()[2:]
+    except OSError:
+        return counters
+    for line in lines:
+        name, _, data = line.partition(':')
+        v = data.split()
+        counters[name.strip()] = (int(v[0]), int(v[1]), int(v[8]), int(v[9]))
+    return counters
+
+def link_name(a: str, b: str) -> str:
+    return ' -- '.join(sorted((a, b)))
+
+class NetSampler:
+    def __init__(self, nodes: list[Node], path: str, interval=NET_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.nodes = list(nodes)
+        # (node, intf) 순서가 곧 interface 코드
+        self.intfs: list[tuple[str, str]] = []
+        self.links: list[str] = []
+        for node in self.nodes:
+            for intf in node.intfList():
+                if intf.link is None:
+                    continue
+                other = intf.link.intf2 if intf.link.intf1 == intf else intf.link.intf1
+                self.intfs.append((node.name, intf.name))
+                self.links.append(link_name(f'{node.name}:{intf.name}', f'{other.node.name}:{other.name}'))
+        self.index = {key: i for i, key in enumerate(self.intfs)}
+        self.cols = {'t': array('d'), 'intf': array('H'), **{c: array('Q') for c in COUNTERS}}
+        self.phases: list[tuple[float, str]] = []
+        self.boundary: np.ndarray = None
+        self.start_time = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def snapshot(self) -> np.ndarray:
+        """Counters of every interface, one row per self.intfs entry."""
+        snap = np.zeros((len(self.intfs), len(COUNTERS)), dtype=np.int64)
+        for node in self.nodes:
+            for name, counters in read_dev(node.pid).items():
+                i = self.index.get((node.name, name))
+                if i is not None:
+                    snap[i] = counters
+        return snap
+
+    def _record(self, t: float, snap: np.ndarray) -> None:
+        c = self.cols
+        for i, row in enumerate(snap):
+            c['t'].append(t)
+            c['intf'].append(i)
+            for name, value in zip(COUNTERS, row):
+                c[name].append(int(value))
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._record(time.time() - self.start_time, self.snapshot())
+
+    def start(self) -> 'NetSampler':
+        global SAMPLER
+        self.start_time = time.time()
+        self.boundary = self.snapshot()
+        self._record(0.0, self.boundary)
+        self._thread = threading.Thread(target=self._run, name='net-sampler', daemon=True)
+        self._thread.start()
+        SAMPLER = self
+        return self
+
+    def phase_end(self, label: str) -> list[dict]:
+        """Per-interface counter deltas since the previous phase boundary."""
+        snap = self.snapshot()
+        delta = snap - self.boundary
+        self.boundary = snap
+        self.phases.append((time.time() - self.start_time, label))
+
+        rows = [{'node': node, 'intf': intf, 'link': self.links[i], **dict(zip(COUNTERS, map(int, delta[i])))}
+                for i, (node, intf) in enumerate(self.intfs)]
+        per_link: dict[str, int] = {}
+        for row in rows:
+            per_link[row['link']] = per_link.get(row['link'], 0) + row['tx_bytes']
+        if per_link:
+            busiest = max(per_link, key=per_link.get)
+            info(f'[{label}] link traffic: {int(delta[:, 2].sum())} B / {int(delta[:, 3].sum())} pkts '
+                 f'over {len(per_link)} links, busiest {busiest} {per_link[busiest]} B\n')
+        return rows
+
+    def stop(self) -> str:
+        """Stop sampling and write the counter time series to self.path."""
+        global SAMPLER
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if SAMPLER is self:
+            SAMPLER = None
+        cols = {name: np.frombuffer(values, dtype=values.typecode) if len(values) else
+                np.array([], dtype=values.typecode) for name, values in self.cols.items()}
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        np.savez_compressed(self.path, **cols,
+                            intf_names=np.array([f'{node}:{intf}' for node, intf in self.intfs]),
+                            links=np.array(self.links),
+                            phase_ends=np.array([t for t, _ in self.phases]),
+                            phases=np.array([label for _, label in self.phases]),
+                            start_time=np.float64(self.start_time), interval=np.float64(self.interval))
+        return self.path
+
+def phase_end(label: str) -> list[dict]:
+    return SAMPLER.phase_end(label) if SAMPLER is not None else []
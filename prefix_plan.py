@@ -0,0 +1,109 @@
+import glob
+import os
+
+from dv import DEFAULT_NETWORK
+
+PREFIX_DIR = os.path.dirname(__file__)
+
+class PrefixPlan:
+    """
+    Expected prefixes of an experiment, parsed once from the prefix files.
+
+    prefix_{router}.txt, prefix_new.txt and file0.txt are read on the first
+    lookup and kept in memory; refresh() re-reads them only when one of the
+    files was added, removed or modified (mtime change). Full names are
+    memoized per network, so lookups inside a convergence loop do no file
+    I/O or parsing.
+    """
+
+    def __init__(self, base_dir=PREFIX_DIR, file0='file0.txt', new_file='prefix_new.txt'):
+        self.base_dir = base_dir
+        self.file0 = file0
+        self.new_file = new_file
+        self._mtimes: dict[str, float] = None
+        self._routers: dict[str, list[str]] = {}
+        self._new: list[str] = None
+        self._file0: list[tuple[str, str]] = None
+        self._names: dict[tuple, list[str]] = {}
+
+    def _files(self) -> list[str]:
+        files = glob.glob(os.path.join(self.base_dir, 'prefix_*.txt'))
+        files.append(os.path.join(self.base_dir, self.file0))
+        return files
+
+    def _stat(self) -> dict[str, float]:
+        mtimes = {}
+        for path in self._files():
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+        return mtimes
+
+    @staticmethod
+    def _read(path: str) -> list[str]:
+        with open(path, 'r') as f:
+            return [line.strip() for line in f if line.strip()]
+
+    def refresh(self) -> bool:
+        """Reload if any prefix file changed. Returns True if it reloaded."""
+        mtimes = self._stat()
+        if mtimes == self._mtimes:
+            return False
+
+        self._routers = {}
+        self._new = None
+        self._file0 = None
+        self._names = {}
+        for path in mtimes:
+            fname = os.path.basename(path)
+            if fname == self.new_file:
+                self._new = [p.lstrip('/') for p in self._read(path)]
+            elif fname == self.file0:
+                self._file0 = []
+                for line in self._read(path):
+                    try:
+                        node_name, prefix = line.split('/', 1)
+                    except ValueError:
+                        continue
+                    self._file0.append((node_name, prefix))
+            else:
+                router = fname[len('prefix_'):-len('.txt')]
+                self._routers[router] = [p.lstrip('/') for p in self._read(path)]
+        self._mtimes = mtimes
+        return True
+
+    def _ensure(self) -> None:
+        if self._mtimes is None:
+            self.refresh()
+
+    def router_prefixes(self, router: str) -> list[str]:
+        """Prefixes (without network/router) listed in prefix_{router}.txt."""
+        self._ensure()
+        return self._routers.get(router, [])
+
+    def routers(self, routers: list[str], network=DEFAULT_NETWORK) -> list[str]:
+        """Full names announced by the given routers."""
+        self._ensure()
+        key = ('routers', network, tuple(routers))
+        if key not in self._names:
+            self._names[key] = [f'{network}/{router}/{prefix}'
+                                for router in routers for prefix in self._routers.get(router, [])]
+        return self._names[key]
+
+    def new_prefixes(self, router='a', network=DEFAULT_NETWORK) -> list[str]:
+        """Full names of the second-phase prefixes, or None if prefix_new.txt is missing."""
+        self._ensure()
+        if self._new is None:
+            return None
+        key = ('new', network, router)
+        if key not in self._names:
+            self._names[key] = [f'{network}/{router}/{prefix}' for prefix in self._new]
+        return self._names[key]
+
+    def file0_prefixes(self, network=DEFAULT_NETWORK) -> list[str]:
+        self._ensure()
+        key = ('file0', network)
+        if key not in self._names:
+            self._names[key] = [f'{network}/{node_name}/{prefix}' for node_name, prefix in self._file0 or []]
+        return self._names[key]
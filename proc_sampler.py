@@ -0,0 +1,194 @@
+"""
+Background /proc sampler for the ndnd processes of every Mininet node.
+
+Every `interval` seconds the sampler reads /proc/<pid>/stat of each
+`ndnd fw`, `ndnd dv` and `ndnd put` process and adds one row per
+(node, kind) with the summed CPU time used since the previous sample, RSS
+and process / thread counts. Processes are attributed to nodes by their
+network namespace, and the process list is rescanned every `rescan`
+seconds so producers started or killed mid-phase are picked up. A process
+started after start() is charged all its CPU since exec in the sample that
+first sees it, so producer signing / segmenting is not lost.
+
+Rows are kept in typed arrays (node, kind and phase as small integer
+codes) and written to `path` as one compressed .npz by stop().
+phase_end(label), called by Metrics.phase, tags every sample since the
+previous phase end with `label`, so CPU and RSS line up with the
+convergence phases.
+"""
+
+import os
+import threading
+import time
+
+from array import array
+
+import numpy as np
+
+from mininet.node import Node
+
+PROC_INTERVAL = 0.5
+PROC_RESCAN = 1.0
+
+KINDS = ('fw', 'dv', 'put')
+
+_CLK_TCK = os.sysconf('SC_CLK_TCK')
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+# 현재 실행 중인 sampler (phase_end 용)
+SAMPLER: 'ProcSampler' = None
+
+def _kind(cmdline: bytes) -> int:
+    args = cmdline.split(b'\0')
+    if len(args) < 2 or os.path.basename(args[0]) != b'ndnd':
+        return None
+    try:
+        return KINDS.index(args[1].decode())
+    except ValueError:
+        return None
+
+def _netns(pid) -> str:
+    try:
+        return os.readlink(f'/proc/{pid}/ns/net')
+    except OSError:
+        return None
+
+def read_stat(pid: int) -> tuple[int, int, int, int]:
+    """
+    (utime + stime ticks, threads, rss pages, start time in ticks since boot)
+    of `pid`, or None if it exited.
+    """
+    try:
+        with open(f'/proc/{pid}/stat', 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    # comm 에 공백이 있을 수 있어 마지막 ')' 뒤부터 센다 (필드 3 = state)
+    fields = data[data.rfind(b')') + 2:].split()
+    return int(fields[11]) + int(fields[12]), int(fields[17]), int(fields[21]), int(fields[19])
+
+def uptime_ticks() -> int:
+    with open('/proc/uptime') as f:
+        return int(float(f.read().split()[0]) * _CLK_TCK)
+
+class ProcSampler:
+    def __init__(self, nodes: list[Node], path: str, interval=PROC_INTERVAL, rescan=PROC_RESCAN):
+        self.path = path
+        self.interval = interval
+        self.rescan = rescan
+        self.node_names = [node.name for node in nodes]
+        self.netns = {_netns(node.pid): i for i, node in enumerate(nodes)}
+        self.procs: dict[int, tuple[int, int]] = {}  # pid -> (node code, kind code)
+        self.ticks: dict[int, int] = {}
+        self.phases: list[tuple[float, str]] = []
+        self.cols = {'t': array('d'), 'node': array('H'), 'kind': array('B'), 'nproc': array('H'),
+                     'threads': array('I'), 'cpu': array('f'), 'rss': array('Q')}
+        self.start_time = None
+        self.start_ticks = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def scan(self) -> None:
+        procs = {}
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            pid = int(entry)
+            if pid in self.procs:
+                procs[pid] = self.procs[pid]
+                continue
+            try:
+                with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                    kind = _kind(f.read())
+            except OSError:
+                continue
+            node = self.netns.get(_netns(pid)) if kind is not None else None
+            if node is not None:
+                stat = read_stat(pid)
+                if stat is None:
+                    continue
+                procs[pid] = (node, kind)
+                # sampler 시작 전에 뜬 프로세스만 지금까지의 CPU 를 기준값으로 잡는다.
+                # 그 뒤에 뜬 프로세스 (rescan 사이의 ndnd put 등) 는 exec 이후 CPU 를
+                # 모두 발견한 sample 에 넣는다
+                self.ticks[pid] = stat[0] if stat[3] < self.start_ticks else 0
+        self.procs = procs
+        self.ticks = {pid: ticks for pid, ticks in self.ticks.items() if pid in procs}
+
+    def sample(self, t: float) -> None:
+        totals: dict[tuple[int, int], list] = {}
+        for pid, key in list(self.procs.items()):
+            stat = read_stat(pid)
+            if stat is None:
+                del self.procs[pid]
+                self.ticks.pop(pid, None)
+                continue
+            ticks, threads, rss, _ = stat
+            used = ticks - self.ticks.get(pid, 0)
+            self.ticks[pid] = ticks
+            row = totals.setdefault(key, [0, 0, 0, 0])
+            row[0] += 1
+            row[1] += threads
+            row[2] += used
+            row[3] += rss
+        c = self.cols
+        for (node, kind), (nproc, threads, used, rss) in sorted(totals.items()):
+            c['t'].append(t)
+            c['node'].append(node)
+            c['kind'].append(kind)
+            c['nproc'].append(nproc)
+            c['threads'].append(threads)
+            c['cpu'].append(used / _CLK_TCK)
+            c['rss'].append(rss * _PAGE_SIZE)
+
+    def _run(self) -> None:
+        next_scan = time.time() + self.rescan
+        while True:
+            now = time.time()
+            if now >= next_scan:
+                self.scan()
+                next_scan = now + self.rescan
+            self.sample(now - self.start_time)
+            if self._stop.wait(self.interval):
+                return
+
+    def start(self) -> 'ProcSampler':
+        global SAMPLER
+        self.start_time = time.time()
+        self.start_ticks = uptime_ticks()
+        self.scan()
+        self._thread = threading.Thread(target=self._run, name='proc-sampler', daemon=True)
+        self._thread.start()
+        SAMPLER = self
+        return self
+
+    def phase_end(self, label: str) -> None:
+        self.phases.append((time.time() - self.start_time, label))
+
+    def columns(self) -> dict[str, np.ndarray]:
+        cols = {name: np.frombuffer(values, dtype=values.typecode) if len(values) else
+                np.array([], dtype=values.typecode) for name, values in self.cols.items()}
+        # phase i: 직전 phase 끝 이후 ~ phase i 끝, 마지막 phase 이후는 -1
+        ends = np.array([t for t, _ in self.phases])
+        phase = np.searchsorted(ends, cols['t'], side='left')
+        cols['phase'] = np.where(phase < len(ends), phase, -1).astype(np.int16)
+        return cols
+
+    def stop(self) -> str:
+        """Stop sampling and write the samples to self.path."""
+        global SAMPLER
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if SAMPLER is self:
+            SAMPLER = None
+        path = self.path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        np.savez_compressed(path, **self.columns(), node_names=np.array(self.node_names),
+                            kinds=np.array(KINDS), phases=np.array([label for _, label in self.phases]),
+                            start_time=np.float64(self.start_time), interval=np.float64(self.interval))
+        return path
+
+def phase_end(label: str) -> None:
+    if SAMPLER is not None:
+        SAMPLER.phase_end(label)
@@ -0,0 +1,112 @@
+"""
+Readiness probes used instead of fixed sleeps.
+
+Every probe polls a condition with a short exponential backoff until it
+holds or its deadline passes (TimeoutError). Elapsed times are measured
+with time.perf_counter, logged in microseconds and kept in PROBE_TIMES.
+"""
+
+import os
+import socket
+import time
+
+from mininet.log import info
+from mininet.node import Node
+
+from convergence_monitor import DV_LOG, node_home
+from route_table import RouteTable
+
+# poll 간격: BACKOFF_MIN 부터 2배씩 BACKOFF_MAX 까지 (초)
+BACKOFF_MIN = 0.001
+BACKOFF_MAX = 0.1
+
+DEFAULT_DEADLINE = 30.0
+
+# 마지막 probe 별 대기 시간 (초)
+PROBE_TIMES: dict[str, float] = {}
+
+def wait_until(check, label: str, deadline=DEFAULT_DEADLINE) -> float:
+    """
+    Poll `check()` until it returns True; returns the seconds waited.
+    Raises TimeoutError after `deadline` seconds.
+    """
+    start = time.perf_counter()
+    end = start + deadline
+    delay = BACKOFF_MIN
+    while not check():
+        now = time.perf_counter()
+        if now >= end:
+            raise TimeoutError(f'{label} not ready after {deadline:g}s')
+        time.sleep(min(delay, end - now))
+        delay = min(delay * 2, BACKOFF_MAX)
+    elapsed = time.perf_counter() - start
+    PROBE_TIMES[label] = elapsed
+    info(f'{label} ready in {elapsed * 1e6:.0f}us\n')
+    return elapsed
+
+def _wait_all(nodes: list[Node], ready, label: str, deadline: float) -> float:
+    """wait_until() for a per-node predicate, rechecking only nodes not yet ready."""
+    pending = list(nodes)
+
+    def check() -> bool:
+        pending[:] = [node for node in pending if not ready(node)]
+        return not pending
+
+    try:
+        return wait_until(check, label, deadline)
+    except TimeoutError as e:
+        raise TimeoutError(f'{e} (waiting on {", ".join(n.name for n in pending)})') from None
+
+def sock_path(node: Node) -> str:
+    """Forwarder unix socket of `node` (NDNd_FW.sockFile / Nfd)."""
+    return f'/run/nfd/{node.name}.sock'
+
+def socket_accepts(path: str) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        try:
+            s.connect(path)
+            return True
+        except OSError:
+            return False
+
+def wait_forwarders(nodes: list[Node], apps: list = None, deadline=DEFAULT_DEADLINE) -> float:
+    """
+    Every node's forwarder accepts connections on its unix socket, taken
+    from the forwarder apps' sockFile when given.
+    """
+    paths = {app.node.name: app.sockFile for app in apps or [] if getattr(app, 'sockFile', None)}
+    return _wait_all(nodes, lambda node: socket_accepts(paths.get(node.name) or sock_path(node)),
+                     'forwarder', deadline)
+
+def route_table(node: Node) -> RouteTable:
+    return RouteTable.parse(node.cmd('ndnd fw route-list'), taken_at=time.time())
+
+def wait_dv(nodes: list[Node], apps: list = None, network='/minindn', deadline=DEFAULT_DEADLINE) -> float:
+    """
+    DV runs on every node and has registered routes under its router name
+    ({network}/{node}) with the forwarder. `apps` (an AppManager's apps)
+    additionally fails fast when a DV process exits.
+    """
+    procs = {app.node.name: app.process for app in apps or [] if getattr(app, 'process', None)}
+
+    def ready(node: Node) -> bool:
+        proc = procs.get(node.name)
+        if proc is not None and proc.poll() is not None:
+            log = os.path.join(node_home(node), DV_LOG)
+            raise Exception(f'ndnd dv exited on {node.name} (code {proc.returncode}), see {log}')
+        return bool(route_table(node).under(f'{network}/{node.name}'))
+
+    return _wait_all(nodes, ready, 'dv', deadline)
+
+def wait_producers(expected: dict[Node, list[str]], label='producers', deadline=DEFAULT_DEADLINE) -> float:
+    """
+    Every `ndnd put --expose` producer has registered its prefix with the
+    forwarder of its own node. `expected` maps node -> full prefixes.
+    """
+    remaining = {node: list(prefixes) for node, prefixes in expected.items() if prefixes}
+
+    def ready(node: Node) -> bool:
+        remaining[node] = route_table(node).missing(remaining[node])
+        return not remaining[node]
+
+    return _wait_all(list(remaining), ready, label, deadline)
@@ -0,0 +1,132 @@
+"""
+CPU-aware per-node resource plan.
+
+The plan divides the CPUs this process may run on (sched_getaffinity, so a
+taskset / cpuset around the runner is respected) between the nodes of the
+topology. Each node gets an equal CPU budget; when the CPUs do not divide
+evenly the first nodes get one CPU more. From its budget every node gets:
+
+  fw threads / GOMAXPROCS   forwarder share of the budget (1..FW_MAX_THREADS)
+  dv GOMAXPROCS             DV share of the budget (1..DV_MAX_PROCS)
+  cpus                      with pin=True, a contiguous CPU set of the
+                            budget's size; with more nodes than CPUs every
+                            node gets one CPU and the sets wrap around
+
+activate() makes a plan current: NDNd_FW and NDNd_DV read their node's
+thread counts from it, pinned apps are moved to their node's CPUs with
+`taskset -a -p` after start, and each node's shell is pinned as well so
+producers started through node.cmd inherit the set. Metrics records
+PLAN.to_dict() in the run metadata.
+"""
+
+import os
+import subprocess
+
+from mininet.log import info
+from mininet.node import Node
+
+# harness (mininet, 수렴 polling) 용으로 남겨 두는 CPU 수
+RESERVED_CPUS = 1
+
+FW_SHARE = 0.5
+DV_SHARE = 0.25
+FW_MAX_THREADS = 4
+DV_MAX_PROCS = 2
+
+# NDNd_FW 의 기존 고정값 (plan 이 없을 때)
+DEFAULT_FW_THREADS = 2
+
+PLAN: 'ResourcePlan' = None
+
+def available_cpus() -> list[int]:
+    return sorted(os.sched_getaffinity(0))
+
+def _share(budget: float, share: float, limit: int) -> int:
+    return max(1, min(limit, int(budget * share)))
+
+class ResourcePlan:
+    def __init__(self, node_names: list[str], cpus: list[int] = None, pin=False,
+                 reserved=RESERVED_CPUS):
+        self.cpus = cpus or available_cpus()
+        self.pin = pin
+        self.nodes = list(node_names)
+        usable = max(1, len(self.cpus) - reserved)
+        count = max(1, len(self.nodes))
+        self.budget = usable / count
+
+        # 나누어떨어지지 않는 CPU 는 앞 노드부터 하나씩 더 준다 (노드가 더 많으면 균등 분할)
+        base, extra = divmod(usable, count)
+        self.node_budget = {name: base + (i < extra) if base else self.budget
+                            for i, name in enumerate(self.nodes)}
+        self.fw_threads = {name: _share(budget, FW_SHARE, FW_MAX_THREADS)
+                           for name, budget in self.node_budget.items()}
+        self.dv_procs = {name: _share(budget, DV_SHARE, DV_MAX_PROCS)
+                         for name, budget in self.node_budget.items()}
+
+        self.node_cpus: dict[str, list[int]] = {}
+        if pin:
+            pool = self.cpus[reserved:] or self.cpus
+            start = 0
+            for name, budget in self.node_budget.items():
+                width = min(len(pool), max(1, int(budget)))
+                start %= len(pool)
+                self.node_cpus[name] = pool[start:start + width] or pool[:width]
+                start += width
+
+    def node_fw_threads(self, name: str) -> int:
+        """Forwarder threads of `name` (the average share for nodes outside the plan)."""
+        return self.fw_threads.get(name) or _share(self.budget, FW_SHARE, FW_MAX_THREADS)
+
+    def node_dv_procs(self, name: str) -> int:
+        return self.dv_procs.get(name) or _share(self.budget, DV_SHARE, DV_MAX_PROCS)
+
+    def cpulist(self, name: str) -> str:
+        return ','.join(map(str, self.node_cpus.get(name, [])))
+
+    def pin_pid(self, name: str, pid: int) -> None:
+        """Move every thread of `pid` to `name`'s CPU set (no-op without pinning)."""
+        cpus = self.cpulist(name)
+        if not cpus or pid is None:
+            return
+        subprocess.run(['taskset', '-a', '-p', '-c', cpus, str(pid)],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def to_dict(self) -> dict:
+        return {
+            'host_cpus': os.cpu_count(),
+            'cpus': len(self.cpus),
+            'nodes': len(self.nodes),
+            'budget': round(self.budget, 3),
+            'node_budget': {name: round(budget, 3) for name, budget in self.node_budget.items()},
+            'fw_threads': self.fw_threads,
+            'dv_gomaxprocs': self.dv_procs,
+            'pin': self.pin,
+            'node_cpus': {name: self.cpulist(name) for name in self.node_cpus},
+        }
+
+def activate(nodes: list[Node], pin=False, cpus: list[int] = None) -> ResourcePlan:
+    """Build the plan for `nodes` and make it current."""
+    global PLAN
+    PLAN = ResourcePlan([node.name for node in nodes], cpus=cpus, pin=pin)
+    for node in nodes:
+        PLAN.pin_pid(node.name, node.pid)
+    fw, dv = PLAN.fw_threads.values(), PLAN.dv_procs.values()
+    info(f'Resource plan: {len(PLAN.cpus)} cpus / {len(nodes)} nodes, '
+         f'fw threads {min(fw, default=0)}-{max(fw, default=0)}, '
+         f'dv GOMAXPROCS {min(dv, default=0)}-{max(dv, default=0)}{", pinned" if pin else ""}\n')
+    return PLAN
+
+def fw_threads(name: str) -> int:
+    return PLAN.node_fw_threads(name) if PLAN else DEFAULT_FW_THREADS
+
+def dv_env(name: str) -> dict[str, str]:
+    return {'GOMAXPROCS': str(PLAN.node_dv_procs(name))} if PLAN else {}
+
+def pin_app(app) -> None:
+    """Pin a started minindn Application to its node's CPUs."""
+    if PLAN and PLAN.pin:
+        process = getattr(app, 'process', None)
+        PLAN.pin_pid(app.node.name, process.pid if process else None)
+
+def to_dict() -> dict:
+    return PLAN.to_dict() if PLAN else None
@@ -0,0 +1,105 @@
+from urllib.parse import unquote
+
+def normalize_name(name: str) -> str:
+    """Canonical form used for lookups: '/a/b' (leading slash, no trailing slash, unescaped)."""
+    return '/' + '/'.join(unquote(c) for c in name.strip().split('/') if c)
+
+class _TrieNode:
+    __slots__ = ('children', 'terminal')
+
+    def __init__(self):
+        self.children: dict[str, '_TrieNode'] = {}
+        self.terminal = False
+
+class RouteTable:
+    """
+    Parsed snapshot of `ndnd fw route-list` output.
+
+    Membership (`name in table`) is an exact match on the whole name, so
+    /minindn/a/com/microsoft is not satisfied by /minindn/a/com/microsoft/data.
+    The name trie answers longest-prefix-match and subtree queries.
+    """
+
+    def __init__(self, taken_at: float = None):
+        self.taken_at = taken_at
+        self.routes: dict[str, list[dict[str, str]]] = {}
+        self._root = _TrieNode()
+
+    @classmethod
+    def parse(cls, output: str, taken_at: float = None) -> 'RouteTable':
+        table = cls(taken_at)
+        for line in output.splitlines():
+            fields = {}
+            name = None
+            for token in line.split():
+                key, sep, value = token.partition('=')
+                if sep:
+                    fields[key] = value
+                elif name is None and token.startswith('/'):
+                    name = token
+            name = fields.pop('prefix', name)
+            if name and name.startswith('/'):
+                table.add(name, fields)
+        return table
+
+    def add(self, name: str, fields: dict[str, str] = None) -> None:
+        name = normalize_name(name)
+        if name not in self.routes:
+            self.routes[name] = []
+            node = self._root
+            for comp in name.split('/')[1:]:
+                node = node.children.setdefault(comp, _TrieNode())
+            node.terminal = True
+        self.routes[name].append(fields or {})
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.routes or normalize_name(name) in self.routes
+
+    def __len__(self) -> int:
+        return len(self.routes)
+
+    def missing(self, prefixes: list[str]) -> list[str]:
+        return [prefix for prefix in prefixes if prefix not in self]
+
+    def first_missing(self, prefixes: list[str]) -> str:
+        for prefix in prefixes:
+            if prefix not in self:
+                return prefix
+        return None
+
+    def first_present(self, prefixes: list[str]) -> str:
+        for prefix in prefixes:
+            if prefix in self:
+                return prefix
+        return None
+
+    def longest_match(self, name: str) -> str:
+        """Longest route prefix covering `name`, or None."""
+        node = self._root
+        best = '/' if node.terminal else None
+        comps = normalize_name(name).split('/')[1:]
+        for i, comp in enumerate(comps):
+            node = node.children.get(comp)
+            if node is None:
+                break
+            if node.terminal:
+                best = '/' + '/'.join(comps[:i + 1])
+        return best
+
+    def under(self, prefix: str) -> list[str]:
+        """All route names equal to or below `prefix`."""
+        prefix = normalize_name(prefix)
+        node = self._root
+        for comp in prefix.split('/')[1:]:
+            node = node.children.get(comp)
+            if node is None:
+                return []
+        found = []
+        stack = [(prefix.rstrip('/'), node)]
+        while stack:
+            name, node = stack.pop()
+            if node.terminal:
+                found.append(name or '/')
+            for comp, child in node.children.items():
+                stack.append((f'{name}/{comp}', child))
+        return sorted(found)
@@ -7,11 +7,34 @@ from types import FunctionType
 from mininet.log import setLogLevel, info
 from minindn.minindn import Minindn
 
+import dv_util
+import netstats
+import proc_sampler
+import resources
+from metrics import METRICS_DIR
 import test_001
 import test_002
 import test_ibf
-
-def run(scenario: FunctionType, **kwargs) -> None:
+import test_withdraw
+
+def run(scenario: FunctionType, warm=False, sample_interval=proc_sampler.PROC_INTERVAL,
+        net_interval=netstats.NET_INTERVAL, **kwargs) -> None:
+    """
+    warm: keep the forwarders, trust root and node keys for the next run
+    and reset only DV, producers and their routes (dv_util.warm_reset).
+    sample_interval: /proc sampling period of the ndnd processes written to
+    METRICS_DIR/proc-<scenario>-<time>.npz (0 disables sampling).
+    net_interval: interface counter sampling period, written to
+    METRICS_DIR/net-<scenario>-<time>.npz (0 disables it).
+    """
+    stamp = f"{scenario.__name__}-{time.strftime('%Y%m%d-%H%M%S')}"
+    sampler = net_sampler = None
+    if sample_interval:
+        path = os.path.join(METRICS_DIR, f'proc-{stamp}.npz')
+        sampler = proc_sampler.ProcSampler(ndn.net.hosts, path, interval=sample_interval).start()
+    if net_interval:
+        path = os.path.join(METRICS_DIR, f'net-{stamp}.npz')
+        net_sampler = netstats.NetSampler(ndn.net.hosts, path, interval=net_interval).start()
     try:
         random.seed(0)
 
@@ -21,17 +44,28 @@ def run(scenario: FunctionType, **kwargs) -> None:
         info(f'Scenario completed in: {time.time()-start:.2f}s\n')
         info(f"===================================================\n\n")
 
+        if warm:
+            dv_util.warm_reset(ndn, kwargs.get('network', dv_util.DEFAULT_NETWORK))
+            return
+
         # Call all cleanups without stopping the network
         # This ensures we don't recreate the network for each test
         for cleanup in reversed(ndn.cleanups):
             cleanup()
     except Exception as e:
+        warm = False
         ndn.stop()
         raise e
     finally:
-        # kill everything we started just in case ...
-        os.system('pkill -9 ndnd')
-        os.system('pkill -9 nfd')
+        if sampler:
+            info(f'Process samples written to {sampler.stop()}\n')
+        if net_sampler:
+            info(f'Interface counters written to {net_sampler.stop()}\n')
+        if not warm:
+            # kill everything we started just in case ...
+            os.system('pkill -9 ndnd')
+            os.system('pkill -9 nfd')
+            dv_util.cold_reset()
 
 if __name__ == '__main__':
     setLogLevel('info')
@@ -47,10 +81,17 @@ if __name__ == '__main__':
     ndn = Minindn()
     ndn.start()
 
+    # 코어 수 / 노드 수에 맞춘 GOMAXPROCS, fw threads (pin=True 면 taskset 고정)
+    resources.activate(ndn.net.hosts)
+
     # run(test_001.scenario_ndnd_fw)
 
 
     run(test_ibf.scenario_ndnd_fw)
+    # withdraw 수렴 (prefix_new.txt 를 announce 후 withdraw)
+    run(test_withdraw.scenario_ndnd_fw)
+    # 같은 forwarder / 키로 이어서 실행하려면 warm=True
+    # run(test_ibf.scenario_ndnd_fw, warm=True)
 
     #run(test_001.scenario_nfd)
     #run(test_002.scenario)
@@ -1,16 +1,20 @@
 import os
-import time
 
 from mininet.log import info
 from minindn.minindn import Minindn
-from minindn.apps.app_manager import AppManager
 from minindn.apps.nfd import Nfd
 
 from fw import NDNd_FW
 import dv_util
+import readiness
+from announce import announce, RateLimiter, ANNOUNCE_RATE, ANNOUNCE_BURST
+from payload import make_payload, ANNOUNCE_PAYLOAD_SIZE
+from advert_log import AdvertLog
+from metrics import Metrics, METRICS_DIR
 
 PREFIX_DIR = os.path.dirname(__file__)  # prefix 파일이 있는 디렉토리
 NETWORK_PREFIX = '/minindn'
+FINAL_ADVERT_LOG = '/tmp/final_advert_log.txt'
 
 def scenario_ndnd_fw(ndn: Minindn):
     scenario(ndn, fw=NDNd_FW)
@@ -18,26 +22,46 @@ def scenario_ndnd_fw(ndn: Minindn):
 def scenario_nfd(ndn: Minindn):
     scenario(ndn, fw=Nfd)
 
-def scenario(ndn: Minindn, fw=None, network=NETWORK_PREFIX):
+def scenario(ndn: Minindn, fw=None, network=NETWORK_PREFIX,
+             announce_rate=ANNOUNCE_RATE, announce_burst=ANNOUNCE_BURST,
+             payload_size=ANNOUNCE_PAYLOAD_SIZE, new_payload_size=None,
+             mode='ibf', metrics_dir=METRICS_DIR):
+    """
+    payload_size / new_payload_size: bytes served by each producer in the
+    first and second phase (new_payload_size defaults to payload_size).
+    The default is a single segment; 10 * 1024 * 1024 reproduces the old
+    10 MB /tmp/test.bin runs.
+    mode: label of the ndnd build under test ('ibf' or 'dv' baseline),
+    stored with the per-phase metrics written to metrics_dir.
+    Returns the convergence time of every phase in seconds.
+    """
     info('Starting forwarder on nodes\n')
-    AppManager(ndn, ndn.net.hosts, fw)
+    dv_util.start_forwarder(ndn, fw)
 
     # Distance Vector 초기화
     dv_util.setup(ndn, network=network)
 
-    # put에 사용할 테스트 파일 생성
-    test_file = '/tmp/test.bin'
-    if not os.path.exists(test_file):
-        os.system(f'dd if=/dev/urandom of={test_file} bs=10M count=1')
+    # 노드별 advert 로그를 phase 단위로 이어서 읽는다 (새로 쓰인 부분만)
+    advert_log = AdvertLog(ndn.net.hosts)
+    metrics = Metrics('test_ibf', mode, {'nodes': len(ndn.net.hosts), 'payload_size': payload_size})
+    times = {}
+
+    # put에 사용할 테스트 파일 생성 (phase 별 크기, 공유 메모리)
+    test_file = make_payload(payload_size)
+    new_test_file = make_payload(new_payload_size or payload_size)
 
     ###############  1. 각 라우터 별로 prefixex put  #################
     router_names = [node.name for node in ndn.net.hosts]
+    plan = dv_util.PLAN
+    plan.refresh()
+    limiter = RateLimiter(announce_rate, announce_burst)
+    announced = {}
 
     for router in router_names:
-        prefix_file = os.path.join(PREFIX_DIR, f'prefix_{router}.txt')
+        prefixes = plan.router_prefixes(router)
 
-        if not os.path.exists(prefix_file):
-            info(f'[WARN] Prefix file not found: {prefix_file}\n')
+        if not prefixes:
+            info(f'[WARN] Prefix file not found: {os.path.join(PREFIX_DIR, f"prefix_{router}.txt")}\n')
             continue
 
         node = next((n for n in ndn.net.hosts if n.name == router), None)
@@ -45,72 +69,45 @@ def scenario(ndn: Minindn, fw=None, network=NETWORK_PREFIX):
             info(f'[WARN] Node not found: {router}\n')
             continue
 
-        with open(prefix_file, 'r') as f:
-            prefixes = [line.strip() for line in f if line.strip()]
-
-        for prefix in prefixes:
-            clean_prefix = prefix.lstrip('/')  
-            full_prefix = f'{network}/{router}/{clean_prefix}'
-            cmd = f'ndnd put --expose "{full_prefix}" < {test_file} &'
-            info(f'{router} {cmd}\n')
-            node.cmd(cmd)
-            time.sleep(0.5)
+        announced[node] = plan.routers([router], network)
+        announce(node, announced[node], test_file, limiter)
 
 
-    # 안정화를 위한 대기
+    # 모든 producer 가 forwarder 에 등록될 때까지 대기
     info('Waiting for all put operations to settle\n')
-    time.sleep(5)
+    readiness.wait_producers(announced)
 
     # 수렴 실행
     info('Running routing convergence...\n')
-    dv_util.converge_ibf(ndn.net.hosts, network=network)
+    times['announce'] = dv_util.converge_ibf(ndn.net.hosts, network=network)
     info('Routing convergence completed.\n')
 
-    #/tmp/final_advert_log.txt
-    write_advert_logs_to_final(ndn, "1차 수렴")
+    metrics.phase("1차 수렴", advert_log.phase("1차 수렴", FINAL_ADVERT_LOG), ndn.net.hosts)
 
     ###############  2. prefix_new.txt 내용을 노드 a에서 put #################
-    new_prefix_file = os.path.join(PREFIX_DIR, 'prefix_new.txt')
+    new_prefixes = plan.new_prefixes('a', network)
     node_a = next((n for n in ndn.net.hosts if n.name == 'a'), None)
 
-    if node_a and os.path.exists(new_prefix_file):
+    if node_a and new_prefixes is not None:
         info('Putting new prefixes from prefix_new.txt via node a\n')
-        with open(new_prefix_file, 'r') as f:
-            new_prefixes = [line.strip() for line in f if line.strip()]
-
-        for prefix in new_prefixes:
-            clean_prefix = prefix.lstrip('/')
-            full_prefix = f'{network}/a/{clean_prefix}'
-            cmd = f'ndnd put --expose "{full_prefix}" < {test_file} &'
-            info(f'a {cmd}\n')
-            node_a.cmd(cmd)
-            time.sleep(0.5)
+        announce(node_a, new_prefixes, new_test_file, limiter)
 
         info('Waiting for new put operations to settle\n')
-        time.sleep(3)
+        readiness.wait_producers({node_a: new_prefixes}, 'new producers')
 
         # 다시 수렴 확인
         info('Running second routing convergence...\n')
-        dv_util.converge_new_prefix(ndn.net.hosts, network=network)
+        times['new_prefix'] = dv_util.converge_new_prefix(ndn.net.hosts, network=network)
         info('Second routing convergence completed.\n')
         
-        #/tmp/final_advert_log.txt
-        write_advert_logs_to_final(ndn, "2차 수렴")
+        metrics.phase("2차 수렴", advert_log.phase("2차 수렴", FINAL_ADVERT_LOG), ndn.net.hosts)
 
     else:
         info('[WARN] prefix_new.txt not found or node a not found. Skipping second phase.\n')
 
 
+    advert_log.report_total()
+    metrics.report()
+    metrics.save(metrics_dir)
     info('All put and convergence steps completed.\n')
-
-def write_advert_logs_to_final(ndn, phase_title, output_file="/tmp/final_advert_log.txt"):
-    with open(output_file, "a") as out:
-        out.write(f"\n===== {phase_title} =====\n")
-        for node in ndn.net.hosts:
-            node_log_path = f"/tmp/minindn/{node.name}/advert_log.txt"
-            out.write(f"\n--- Node {node.name} ---\n")
-            if os.path.exists(node_log_path):
-                with open(node_log_path, "r") as node_log:
-                    out.write(node_log.read())
-            else:
-                out.write("[No advert log found]\n")
+    return times
@@ -0,0 +1,93 @@
+from mininet.log import info
+from minindn.minindn import Minindn
+from minindn.apps.nfd import Nfd
+
+from fw import NDNd_FW
+import dv_util
+import readiness
+from announce import announce, withdraw, RateLimiter, ANNOUNCE_RATE, ANNOUNCE_BURST
+from payload import make_payload, ANNOUNCE_PAYLOAD_SIZE
+from advert_log import AdvertLog
+from metrics import Metrics, METRICS_DIR
+
+NETWORK_PREFIX = '/minindn'
+
+def scenario_ndnd_fw(ndn: Minindn):
+    scenario(ndn, fw=NDNd_FW)
+
+def scenario_nfd(ndn: Minindn):
+    scenario(ndn, fw=Nfd)
+
+def scenario(ndn: Minindn, fw=None, network=NETWORK_PREFIX,
+             announce_rate=ANNOUNCE_RATE, announce_burst=ANNOUNCE_BURST,
+             payload_size=ANNOUNCE_PAYLOAD_SIZE, withdraw_router='a',
+             mode='ibf', metrics_dir=METRICS_DIR):
+    """
+    Withdrawal convergence: every router announces its prefix_<router>.txt,
+    `withdraw_router` then announces prefix_new.txt and finally withdraws it
+    again by killing those producers. Returns the convergence times of the
+    three phases; per-phase metrics are written to metrics_dir.
+    """
+    info('Starting forwarder on nodes\n')
+    dv_util.start_forwarder(ndn, fw)
+
+    # Distance Vector 초기화
+    dv_util.setup(ndn, network=network)
+    advert_log = AdvertLog(ndn.net.hosts)
+    metrics = Metrics('test_withdraw', mode, {'nodes': len(ndn.net.hosts), 'withdraw_router': withdraw_router})
+
+    test_file = make_payload(payload_size)
+    plan = dv_util.PLAN
+    plan.refresh()
+    limiter = RateLimiter(announce_rate, announce_burst)
+    times = {}
+
+    ###############  1. 각 라우터 별로 prefix put  #################
+    announced = {}
+    for node in ndn.net.hosts:
+        prefixes = plan.routers([node.name], network)
+        if prefixes:
+            announce(node, prefixes, test_file, limiter)
+            announced[node] = prefixes
+
+    # 모든 producer 가 forwarder 에 등록될 때까지 대기
+    info('Waiting for all put operations to settle\n')
+    readiness.wait_producers(announced)
+
+    info('Running routing convergence...\n')
+    times['announce'] = dv_util.converge_ibf(ndn.net.hosts, network=network)
+    metrics.phase('1차 수렴', advert_log.phase('1차 수렴'), ndn.net.hosts)
+
+    ###############  2. withdraw 대상 prefix put  #################
+    node = next((n for n in ndn.net.hosts if n.name == withdraw_router), None)
+    new_prefixes = plan.new_prefixes(withdraw_router, network)
+    if node is None or not new_prefixes:
+        info(f'[WARN] node {withdraw_router} or prefix_new.txt not found. Skipping withdrawal.\n')
+        metrics.save(metrics_dir)
+        return times
+
+    announce(node, new_prefixes, test_file, limiter)
+    info('Waiting for new put operations to settle\n')
+    readiness.wait_producers({node: new_prefixes}, 'new producers')
+
+    info('Running new prefix convergence...\n')
+    times['new_prefix'] = dv_util.converge_new_prefix(ndn.net.hosts, network=network,
+                                                      prefixes=new_prefixes)
+    metrics.phase('2차 수렴', advert_log.phase('2차 수렴'), ndn.net.hosts)
+
+    ###############  3. producer 종료로 withdraw  #################
+    info(f'Withdrawing {len(new_prefixes)} prefixes from {withdraw_router}\n')
+    withdraw(node, new_prefixes, limiter)
+    times['withdraw'] = dv_util.converge_withdraw(ndn.net.hosts, new_prefixes)
+    metrics.phase('withdraw 수렴', advert_log.phase('withdraw 수렴'), ndn.net.hosts)
+
+    # 나머지 prefix는 그대로 남아 있어야 한다
+    if not dv_util.is_converged_ibf(ndn.net.hosts, network=network):
+        raise Exception('Withdrawal removed routes that were not withdrawn')
+
+    advert_log.report_total()
+    metrics.report()
+    metrics.save(metrics_dir)
+    info(f"Convergence: announce {times['announce']:.3f}s, new prefix {times['new_prefix']:.3f}s, "
+         f"withdraw {times['withdraw']:.3f}s\n")
+    return times